@@ -0,0 +1,159 @@
+"""Run the benchmarks: python -m benchmarks --help."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from . import harness, micro  # noqa: E402
+from .scenarios import SCENARIOS  # noqa: E402
+
+# Metrics where a higher value is better, all others should go down
+HIGHER_IS_BETTER = {"throughput"}
+COMPARED_METRICS = ("overhead_p50_ms", "throughput", "peak_kib")
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the integration against a local mock of the Cloud.ru API.",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="scenario to run, all by default, may be repeated",
+    )
+    parser.add_argument("--sessions", type=int, default=20, help="conversations per scenario (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent conversations (default: 8)")
+    parser.add_argument("--memory", action="store_true", help="measure the peak memory of a turn with tracemalloc")
+    parser.add_argument("--number", type=int, default=2000, help="iterations of a microbenchmark (default: 2000)")
+    parser.add_argument("--micro-only", action="store_true", help="run only the microbenchmarks")
+    parser.add_argument("--no-micro", action="store_true", help="skip the microbenchmarks")
+    parser.add_argument(
+        "--check", action="store_true", help="only check _transform_stream against a reference on the recorded streams"
+    )
+    parser.add_argument(
+        "--streams",
+        type=Path,
+        default=micro.STREAMS_DIR,
+        help="directory of recorded streams, chunks or debug logs in *.jsonl (default: benchmarks/streams)",
+    )
+    parser.add_argument("--json", type=Path, help="write the results to a file")
+    parser.add_argument("--baseline", type=Path, help="compare with the results of an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="relative change reported as a regression (default: 0.2)"
+    )
+    return parser.parse_args()
+
+
+def _print_micro(results: dict[str, float]) -> None:
+    """Print the microbenchmark results."""
+    print(f"\n{'microbenchmark':<32}{'µs/op':>12}")
+    for name, value in results.items():
+        print(f"{name:<32}{value:>12.2f}")
+
+
+def _print_scenarios(results: dict[str, dict[str, Any]]) -> None:
+    """Print the scenario results."""
+    columns = (
+        ("turns", "turns"),
+        ("turn_p50_ms", "p50 ms"),
+        ("turn_p95_ms", "p95 ms"),
+        ("overhead_p50_ms", "overhead ms"),
+        ("ttft_p50_ms", "TTFT ms"),
+        ("throughput", "turns/s"),
+        ("peak_kib", "peak KiB"),
+        ("requests", "req/turn"),
+    )
+    print(f"\n{'scenario':<14}" + "".join(f"{title:>13}" for _key, title in columns))
+    for name, result in results.items():
+        cells = ("-" if (value := result[key]) is None else f"{value:g}" for key, _title in columns)
+        print(f"{name:<14}" + "".join(f"{cell:>13}" for cell in cells))
+
+
+def _compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Return the metrics that got worse than the baseline by more than the threshold."""
+    pairs: list[tuple[str, str, float | None, float | None]] = [
+        ("micro", name, value, baseline.get("micro", {}).get(name))
+        for name, value in results.get("micro", {}).items()
+    ]
+    for scenario, result in results.get("scenarios", {}).items():
+        old = baseline.get("scenarios", {}).get(scenario, {})
+        pairs.extend((scenario, metric, result.get(metric), old.get(metric)) for metric in COMPARED_METRICS)
+
+    regressions = []
+    for group, metric, value, old in pairs:
+        if value is None or not old:
+            continue
+        change = (value - old) / old
+        if metric in HIGHER_IS_BETTER:
+            change = -change
+        if change > threshold:
+            regressions.append(f"{group} {metric}: {old:g} → {value:g} ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmarks."""
+    args = _parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.check:
+        checks = micro.check(args.streams)
+        for name, ok in checks.items():
+            print(f"transform_stream[{name}]: {'ok' if ok else 'MISMATCH'}")
+        return 0 if all(checks.values()) else 1
+
+    results: dict[str, Any] = {}
+    if not args.no_micro:
+        results["micro"] = micro.run(args.number, args.streams)
+        _print_micro(results["micro"])
+
+    if not args.micro_only:
+        scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+        with tempfile.TemporaryDirectory(prefix="cloud_ru_ai_bench_") as config_dir:
+            scenario_results = asyncio.run(
+                harness.async_run(config_dir, scenarios, args.sessions, args.concurrency, args.memory)
+            )
+        results["scenarios"] = {name: result.as_dict() for name, result in scenario_results.items()}
+        _print_scenarios(results["scenarios"])
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if regressions := _compare(results, baseline, args.threshold):
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""End-to-end benchmark of the integration in a local Home Assistant."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import statistics
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from functools import partial
+from types import MappingProxyType
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant import auth, config_entries, loader
+from homeassistant.components import ai_task, conversation
+from homeassistant.config_entries import ConfigEntry, ConfigSubentryData
+from homeassistant.core import Context, Event, HomeAssistant
+from homeassistant.helpers import (area_registry, category_registry,
+                                   device_registry, entity_registry,
+                                   floor_registry, issue_registry,
+                                   label_registry, llm)
+from homeassistant.setup import async_setup_component
+
+from .mock_server import MODEL_ID, MockServer
+from .scenarios import BENCH_LLM_API, STRUCTURE, BenchAPI, Scenario
+
+DOMAIN = "cloud_ru_ai"
+EVENT_TURN_TIMING = f"{DOMAIN}_turn_timing"
+
+# Conversations run before measuring, so caches and connections are warm
+WARMUP_SESSIONS = 2
+
+
+@dataclass(slots=True)
+class ScenarioResult:
+    """Measurements of a scenario."""
+
+    turns: int
+    # Requests and rejected requests per turn
+    requests: float
+    errors: float
+    turn_p50_ms: float
+    turn_p95_ms: float
+    # Time of a turn spent outside the mock server
+    overhead_p50_ms: float
+    overhead_mean_ms: float
+    ttft_p50_ms: float | None
+    throughput: float
+    peak_kib: float | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the measurements."""
+        return asdict(self)
+
+
+def _percentile(values: list[float], percentile: int) -> float:
+    """Return a nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, -(-percentile * len(ordered) // 100) - 1)]
+
+
+def _free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Start a minimal Home Assistant with the conversation and AI task components."""
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    # The AI task component serves generated images from a media directory
+    media_dir = os.path.join(config_dir, "media")
+    os.makedirs(media_dir, exist_ok=True)
+    hass.config.media_dirs = {"local": media_dir}
+    loader.async_setup(hass)
+    await asyncio.gather(
+        area_registry.async_load(hass),
+        category_registry.async_load(hass),
+        device_registry.async_load(hass),
+        entity_registry.async_load(hass),
+        floor_registry.async_load(hass),
+        issue_registry.async_load(hass),
+        label_registry.async_load(hass),
+    )
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    hass.auth = await auth.auth_manager_from_config(hass, [], [])
+    await async_setup_component(hass, "homeassistant", {})
+    await async_setup_component(hass, "http", {"http": {"server_port": _free_port()}})
+    for component in (conversation.DOMAIN, ai_task.DOMAIN):
+        if not await async_setup_component(hass, component, {}):
+            raise RuntimeError(f"Unable to set up {component}")
+    llm.async_register_api(hass, BenchAPI(hass=hass, id=BENCH_LLM_API, name="Benchmark"))
+    return hass
+
+
+async def _async_add_entry(hass: HomeAssistant, concurrency: int) -> dict[str, str]:
+    """Add a config entry with the benchmark agents and return their entity IDs."""
+    subentries = {
+        "chat": ("conversation", {"chat_model": MODEL_ID, "prompt": "Отвечай кратко."}),
+        "tools": (
+            "conversation",
+            {"chat_model": MODEL_ID, "prompt": "Отвечай кратко.", "llm_hass_api": [BENCH_LLM_API]},
+        ),
+        "ai_task": ("ai_task_data", {"chat_model": MODEL_ID}),
+    }
+    entry = ConfigEntry(
+        domain=DOMAIN,
+        title="Benchmark",
+        data={"api_key": "bench", "project_id": "bench"},
+        # The request limiter is not what is measured
+        options={"rate_limit": 0, "max_in_flight": max(4, concurrency)},
+        source=config_entries.SOURCE_USER,
+        version=2,
+        minor_version=2,
+        unique_id=None,
+        discovery_keys=MappingProxyType({}),
+        subentries_data=[
+            ConfigSubentryData(data=data, subentry_type=subentry_type, title=agent, unique_id=None)
+            for agent, (subentry_type, data) in subentries.items()
+        ],
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+
+    registry = entity_registry.async_get(hass)
+    entity_ids: dict[str, str] = {}
+    for subentry_id, subentry in entry.subentries.items():
+        platform = conversation.DOMAIN if subentry.subentry_type == "conversation" else ai_task.DOMAIN
+        if (entity_id := registry.async_get_entity_id(platform, DOMAIN, subentry_id)) is None:
+            raise RuntimeError(f"No entity for {subentry.title}")
+        entity_ids[subentry.title] = entity_id
+    return entity_ids
+
+
+def _turns(
+    hass: HomeAssistant, scenario: Scenario, entity_id: str, session: int
+) -> list[Callable[[], Awaitable[None]]]:
+    """Return the turns of a conversation, or the AI task of a session."""
+    conversation_id: str | None = None
+
+    async def _converse(turn: int) -> None:
+        nonlocal conversation_id
+        result = await conversation.async_converse(
+            hass,
+            f"Сессия {session}, вопрос {turn}: какая температура в гостиной?",
+            conversation_id,
+            Context(),
+            language="ru",
+            agent_id=entity_id,
+        )
+        conversation_id = result.conversation_id
+
+    async def _generate() -> None:
+        await ai_task.async_generate_data(
+            hass,
+            task_name="bench",
+            entity_id=entity_id,
+            instructions=f"Сессия {session}: опиши событие «протечка в ванной»",
+            structure=STRUCTURE,
+        )
+
+    if scenario.agent == "ai_task":
+        return [_generate]
+    return [partial(_converse, turn) for turn in range(scenario.turns)]
+
+
+async def _async_run_scenario(
+    hass: HomeAssistant,
+    server: MockServer,
+    scenario: Scenario,
+    entity_id: str,
+    sessions: int,
+    concurrency: int,
+    memory: bool,
+) -> ScenarioResult:
+    """Run the sessions of a scenario: sequentially for latency, then concurrently for throughput."""
+    server.responder = scenario.create_responder()
+    first_tokens: list[float] = []
+
+    def _turn_timing(event: Event[dict[str, Any]]) -> None:
+        if event.data["entity_id"] == entity_id and event.data["first_token"] is not None:
+            first_tokens.append(event.data["first_token"])
+
+    for session in range(WARMUP_SESSIONS):
+        for turn in _turns(hass, scenario, entity_id, -1 - session):
+            await turn()
+
+    requests, errors = server.requests, server.errors
+    turn_times: list[float] = []
+    overheads: list[float] = []
+    unsubscribe = hass.bus.async_listen(EVENT_TURN_TIMING, _turn_timing)
+    for session in range(sessions):
+        for turn in _turns(hass, scenario, entity_id, session):
+            server_time = server.server_time
+            start = time.perf_counter()
+            await turn()
+            elapsed = time.perf_counter() - start
+            turn_times.append(elapsed * 1000)
+            overheads.append((elapsed - (server.server_time - server_time)) * 1000)
+    unsubscribe()
+    requests, errors = server.requests - requests, server.errors - errors
+
+    peak_kib: float | None = None
+    if memory:
+        peaks: list[float] = []
+        tracemalloc.start()
+        for session in range(sessions):
+            for turn in _turns(hass, scenario, entity_id, sessions + session):
+                current, _peak = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await turn()
+                peaks.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+        tracemalloc.stop()
+        peak_kib = round(statistics.median(peaks), 1)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run_session(session: int) -> None:
+        async with semaphore:
+            for turn in _turns(hass, scenario, entity_id, 2 * sessions + session):
+                await turn()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_run_session(session) for session in range(sessions)))
+    throughput = len(turn_times) / (time.perf_counter() - start)
+
+    return ScenarioResult(
+        turns=len(turn_times),
+        requests=round(requests / len(turn_times), 2),
+        errors=round(errors / len(turn_times), 2),
+        turn_p50_ms=round(_percentile(turn_times, 50), 2),
+        turn_p95_ms=round(_percentile(turn_times, 95), 2),
+        overhead_p50_ms=round(_percentile(overheads, 50), 2),
+        overhead_mean_ms=round(statistics.fmean(overheads), 2),
+        ttft_p50_ms=round(_percentile(first_tokens, 50), 2) if first_tokens else None,
+        throughput=round(throughput, 1),
+        peak_kib=peak_kib,
+    )
+
+
+async def async_run(
+    config_dir: str,
+    scenarios: list[Scenario],
+    sessions: int,
+    concurrency: int,
+    memory: bool,
+) -> dict[str, ScenarioResult]:
+    """Run the scenarios against the mock server."""
+    import custom_components.cloud_ru_ai as integration  # noqa: PLC0415
+    from custom_components.cloud_ru_ai import warmup  # noqa: PLC0415
+
+    server = MockServer(scenarios[0].create_responder())
+    base_url = await server.async_start()
+    hass: HomeAssistant | None = None
+    try:
+        with ExitStack() as stack:
+            for module in (integration, warmup):
+                stack.enter_context(patch.object(module, "CLIENT_BASE_URI", base_url))
+            hass = await _async_start_hass(config_dir)
+            entity_ids = await _async_add_entry(hass, concurrency)
+            return {
+                scenario.name: await _async_run_scenario(
+                    hass, server, scenario, entity_ids[scenario.agent], sessions, concurrency, memory
+                )
+                for scenario in scenarios
+            }
+    finally:
+        if hass is not None:
+            await hass.async_stop()
+        await server.async_stop()
@@ -0,0 +1,250 @@
+"""Microbenchmarks of the per-request hot paths of the integration."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import (AsyncIterator, Awaitable, Callable, Iterable,
+                             Iterator)
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from homeassistant.components import conversation
+from homeassistant.helpers import llm
+from openai.types.chat import ChatCompletionChunk
+
+from .scenarios import BENCH_TOOLS, BenchTool
+
+REPEAT = 5
+
+
+STREAMS_DIR = Path(__file__).parent / "streams"
+# Prefix of the chunks logged by the integration at the debug level
+LOGGED_CHUNK = "Received chunk: "
+
+
+def load_stream(path: Path) -> list[ChatCompletionChunk]:
+    """Load a recorded stream, one chunk in JSON per line.
+
+    Debug logs of the integration work too: lines without a logged chunk are skipped.
+    """
+    chunks = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if LOGGED_CHUNK in line:
+            line = line.split(LOGGED_CHUNK, 1)[1]
+        elif not line.startswith("{"):
+            continue
+        chunks.append(ChatCompletionChunk.model_validate_json(line))
+    return chunks
+
+
+def _split_chunk(chunk: ChatCompletionChunk) -> Iterator[ChatCompletionChunk]:
+    """Split the text or tool call arguments of a chunk into one chunk per character."""
+    if not chunk.choices:
+        yield chunk
+        return
+    choice = chunk.choices[0]
+    delta = choice.delta
+    if delta.tool_calls and len(delta.tool_calls) == 1 and (function := delta.tool_calls[0].function):
+        tool_call = delta.tool_calls[0]
+        arguments = function.arguments or ""
+        deltas = [
+            delta.model_copy(
+                update={
+                    "tool_calls": [
+                        tool_call.model_copy(
+                            update={
+                                "id": tool_call.id if i == 0 else None,
+                                "function": function.model_copy(
+                                    update={"name": function.name if i == 0 else None, "arguments": char}
+                                ),
+                            }
+                        )
+                    ]
+                }
+            )
+            for i, char in enumerate(arguments)
+        ]
+    elif not delta.tool_calls and delta.content:
+        deltas = [
+            delta.model_copy(update={"content": char, "role": delta.role if i == 0 else None})
+            for i, char in enumerate(delta.content)
+        ]
+    else:
+        deltas = []
+    if len(deltas) < 2:
+        yield chunk
+        return
+    for i, part in enumerate(deltas):
+        finish_reason = choice.finish_reason if i == len(deltas) - 1 else None
+        yield chunk.model_copy(
+            update={"choices": [choice.model_copy(update={"delta": part, "finish_reason": finish_reason})]}
+        )
+
+
+def _reference_transform(chunks: list[ChatCompletionChunk]) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Return the text deltas and the tool calls of a stream, worked out the simple way.
+
+    Text deltas are built as the transformer did before it was optimized,
+    tool calls from their concatenated arguments once the stream has ended.
+    Malformed arguments map to None.
+    """
+    text: list[dict[str, Any]] = []
+    calls: dict[int, list[Any]] = {}
+    for chunk in chunks:
+        if not chunk.choices:
+            break
+        choice = chunk.choices[0]
+        delta = choice.delta
+        if delta.tool_calls:
+            for tool_call in delta.tool_calls:
+                function = tool_call.function
+                call = calls.setdefault(tool_call.index, [tool_call.id, function.name if function else None, ""])
+                if function:
+                    call[2] += function.arguments or ""
+        elif not delta.content or delta.content.strip():
+            if data := {key: value for key in ("role", "content") if (value := getattr(delta, key)) is not None}:
+                text.append(data)
+        if choice.finish_reason:
+            break
+
+    tool_calls: dict[str, Any] = {}
+    for tool_call_id, tool_name, arguments in (calls[index] for index in sorted(calls)):
+        try:
+            tool_args = json.loads(arguments) if arguments else {}
+        except ValueError:
+            tool_args = None
+        tool_calls[tool_call_id] = (tool_name, tool_args if isinstance(tool_args, dict) else None)
+    return text, tool_calls
+
+
+async def _async_transform(chunks: list[ChatCompletionChunk]) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Return the text deltas and the tool calls yielded by _transform_stream."""
+    from custom_components.cloud_ru_ai.entity import \
+        _transform_stream  # noqa: PLC0415
+
+    text: list[dict[str, Any]] = []
+    tool_calls: dict[str, Any] = {}
+    async for delta in _transform_stream(_aiter(chunks)):
+        if "tool_calls" in delta:
+            for tool_input in delta["tool_calls"]:
+                tool_calls[tool_input.id] = (tool_input.tool_name, tool_input.tool_args)
+        elif "tool_call_id" in delta:
+            # The error result of malformed arguments
+            tool_calls[delta["tool_call_id"]] = (delta["tool_name"], None)
+        else:
+            text.append(dict(delta))
+    return text, tool_calls
+
+
+async def async_check(streams_dir: Path = STREAMS_DIR) -> dict[str, bool]:
+    """Check _transform_stream against the simple reference on the recorded streams.
+
+    Every stream is also replayed with its text and arguments split into
+    one chunk per character.
+    """
+    results = {}
+    for path in sorted(streams_dir.glob("*.jsonl")):
+        chunks = load_stream(path)
+        split = [part for chunk in chunks for part in _split_chunk(chunk)]
+        for name, stream in ((path.stem, chunks), (f"{path.stem}/split", split)):
+            results[name] = await _async_transform(stream) == _reference_transform(stream)
+    return results
+
+
+def check(streams_dir: Path = STREAMS_DIR) -> dict[str, bool]:
+    """Run the check in a new event loop."""
+    return asyncio.run(async_check(streams_dir))
+
+
+def _chat_log_content() -> list[conversation.Content]:
+    """Return the content of a conversation with tool calls, twenty turns long."""
+    content: list[conversation.Content] = [conversation.SystemContent(content="Отвечай кратко.")]
+    for turn in range(10):
+        content.append(conversation.UserContent(content=f"Включи свет номер {turn}"))
+        tool_call = llm.ToolInput(id=f"call_{turn}", tool_name="BenchTool0", tool_args={"name": f"Свет {turn}"})
+        content.append(conversation.AssistantContent(agent_id="bench", tool_calls=[tool_call]))
+        content.append(
+            conversation.ToolResultContent(
+                agent_id="bench",
+                tool_call_id=tool_call.id,
+                tool_name=tool_call.tool_name,
+                tool_result={"success": True, "targets": [{"name": f"Свет {turn}"}]},
+            )
+        )
+        content.append(conversation.AssistantContent(agent_id="bench", content="Готово."))
+    return content
+
+
+async def _aiter[T](items: Iterable[T]) -> AsyncIterator[T]:
+    """Yield the items."""
+    for item in items:
+        yield item
+
+
+async def _async_time(operation: Callable[[], Awaitable[None]], number: int) -> float:
+    """Return the best time of an operation in microseconds."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        best = min(best, time.perf_counter() - start)
+    return round(best / number * 1_000_000, 2)
+
+
+async def async_run(number: int, streams_dir: Path = STREAMS_DIR) -> dict[str, float]:
+    """Run the microbenchmarks and return microseconds per operation.
+
+    Transforming every recorded stream, formatting twenty tool specs
+    and converting a chat log of forty items.
+    """
+    from custom_components.cloud_ru_ai.entity import (  # noqa: PLC0415
+        _convert_content_to_chat_message, _format_tool, _transform_stream)
+
+    streams = {path.stem: load_stream(path) for path in sorted(streams_dir.glob("*.jsonl"))}
+    tools = [BenchTool(index) for index in range(BENCH_TOOLS)]
+    content = _chat_log_content()
+
+    async def _transform(chunks: list[ChatCompletionChunk]) -> None:
+        async for _delta in _transform_stream(_aiter(chunks)):
+            pass
+
+    async def _format_tools() -> None:
+        for tool in tools:
+            _format_tool(tool, llm.selector_serializer)
+
+    async def _convert_messages() -> None:
+        for item in content:
+            _convert_content_to_chat_message(item)
+
+    results = {
+        f"transform_stream[{name}]": await _async_time(partial(_transform, chunks), number)
+        for name, chunks in streams.items()
+    }
+    return results | {
+        "format_tool": await _async_time(_format_tools, max(1, number // 10)),
+        "convert_messages": await _async_time(_convert_messages, number),
+    }
+
+
+def run(number: int, streams_dir: Path = STREAMS_DIR) -> dict[str, float]:
+    """Run the microbenchmarks in a new event loop."""
+    return asyncio.run(async_run(number, streams_dir))
@@ -0,0 +1,188 @@
+"""OpenAI-compatible stub of the Cloud.ru Foundation Models API."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+MODEL_ID = "bench/model"
+
+
+@dataclass(slots=True)
+class Reply:
+    """Scripted answer to a chat completion request."""
+
+    content: str = ""
+    tool_calls: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    # A status other than 200 answers with an error and a retry delay
+    status: int = 200
+    retry_after: float = 0.0
+    first_token_delay: float = 0.0
+    chunk_delay: float = 0.0
+    # Characters of content or tool arguments per streamed chunk
+    chunk_size: int = 8
+
+
+type Responder = Callable[[dict[str, Any]], Reply]
+
+
+def _split(text: str, size: int) -> list[str]:
+    """Split text into streamed pieces."""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _usage(body: dict[str, Any], reply: Reply) -> dict[str, int]:
+    """Return a rough token count of a request and its reply."""
+    prompt_tokens = len(json.dumps(body["messages"])) // 4
+    completion_tokens = (len(reply.content) + len(json.dumps(reply.tool_calls))) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class MockServer:
+    """Local chat completions server answering with scripted replies.
+
+    The time spent handling requests, scripted delays included, is added
+    up, so the time a turn spends in the integration can be told apart.
+    """
+
+    def __init__(self, responder: Responder) -> None:
+        """Initialize the server."""
+        self.responder = responder
+        self.requests = 0
+        self.errors = 0
+        self.server_time = 0.0
+        self._runner: web.AppRunner | None = None
+
+    async def async_start(self) -> str:
+        """Start the server and return its base URL."""
+        app = web.Application()
+        app.router.add_get("/v1/models", self._handle_models)
+        app.router.add_post("/v1/chat/completions", self._handle_completion)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def async_stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle_models(self, _request: web.Request) -> web.Response:
+        """List the benchmark model."""
+        return web.json_response(
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "id": MODEL_ID,
+                        "object": "model",
+                        "created": 0,
+                        "owned_by": "bench",
+                        "metadata": {"type": "llm", "is_billable": True},
+                        "function_calling": True,
+                        "structure_output": True,
+                    }
+                ],
+            }
+        )
+
+    async def _handle_completion(self, request: web.Request) -> web.StreamResponse:
+        """Answer a chat completion request with the scripted reply."""
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            body = await request.json()
+            reply = self.responder(body)
+            if reply.status != 200:
+                self.errors += 1
+                return web.json_response(
+                    {"error": {"message": "Scripted error", "type": "scripted", "code": str(reply.status)}},
+                    status=reply.status,
+                    headers={"retry-after-ms": str(round(reply.retry_after * 1000))},
+                )
+            await asyncio.sleep(reply.first_token_delay)
+            if body.get("stream"):
+                return await self._async_stream(request, body, reply)
+            return web.json_response(self._completion(body, reply))
+        finally:
+            self.server_time += time.perf_counter() - start
+
+    def _completion(self, body: dict[str, Any], reply: Reply) -> dict[str, Any]:
+        """Return a non-streamed completion."""
+        message: dict[str, Any] = {"role": "assistant", "content": reply.content or None}
+        if reply.tool_calls:
+            message["tool_calls"] = [
+                {"id": f"call_{index}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+                for index, (name, args) in enumerate(reply.tool_calls)
+            ]
+        return {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": "tool_calls" if reply.tool_calls else "stop"}
+            ],
+            "usage": _usage(body, reply),
+        }
+
+    async def _async_stream(self, request: web.Request, body: dict[str, Any], reply: Reply) -> web.StreamResponse:
+        """Stream the reply as server-sent events."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def _send(choices: list[dict[str, Any]], **extra: Any) -> None:
+            chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": body["model"]}
+            await response.write(f"data: {json.dumps({**chunk, 'choices': choices, **extra})}\n\n".encode())
+
+        def _delta(delta: dict[str, Any], finish_reason: str | None = None) -> list[dict[str, Any]]:
+            return [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+
+        role: dict[str, Any] = {"role": "assistant"}
+        if reply.content:
+            for piece in _split(reply.content, reply.chunk_size):
+                await _send(_delta({**role, "content": piece}))
+                role = {}
+                await asyncio.sleep(reply.chunk_delay)
+        for index, (name, args) in enumerate(reply.tool_calls):
+            call = {"index": index, "id": f"call_{index}", "type": "function", "function": {"name": name}}
+            await _send(_delta({**role, "tool_calls": [call]}))
+            role = {}
+            for piece in _split(json.dumps(args), reply.chunk_size):
+                await _send(_delta({"tool_calls": [{"index": index, "function": {"arguments": piece}}]}))
+                await asyncio.sleep(reply.chunk_delay)
+        await _send(_delta({}, "tool_calls" if reply.tool_calls else "stop"))
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await _send([], usage=_usage(body, reply))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
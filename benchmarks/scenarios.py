@@ -0,0 +1,150 @@
+"""Benchmark scenarios driving the conversation and AI task entities."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import llm
+from homeassistant.util.json import JsonObjectType
+
+from .mock_server import Reply, Responder
+
+BENCH_LLM_API = "cloud_ru_ai_bench"
+BENCH_TOOLS = 20
+
+ANSWER = (
+    "Сейчас в гостиной двадцать один градус, влажность сорок процентов. "
+    "Свет на кухне выключен, а входная дверь заперта. "
+    "Если хотите, я могу включить обогреватель или проверить окна."
+)
+
+STRUCTURE = vol.Schema(
+    {
+        vol.Required("summary"): str,
+        vol.Required("priority"): vol.In(["low", "normal", "high"]),
+        vol.Optional("tags"): [str],
+    }
+)
+
+
+class BenchTool(llm.Tool):
+    """Tool with a schema shaped like the Assist intents."""
+
+    def __init__(self, index: int) -> None:
+        """Initialize the tool."""
+        self.name = f"BenchTool{index}"
+        self.description = f"Benchmark tool number {index}, controls a device by name or area"
+        self.parameters = vol.Schema(
+            {
+                vol.Optional("name"): str,
+                vol.Optional("area"): str,
+                vol.Optional("domain"): vol.All(vol.Coerce(list), [vol.In(["light", "switch", "fan"])]),
+                vol.Optional("brightness"): vol.All(vol.Coerce(int), vol.Range(0, 100)),
+            }
+        )
+
+    async def async_call(
+        self, hass: HomeAssistant, tool_input: llm.ToolInput, llm_context: llm.LLMContext
+    ) -> JsonObjectType:
+        """Pretend the device was controlled."""
+        return {"success": True, "targets": [{"name": tool_input.tool_args.get("name", "device")}]}
+
+
+class BenchAPI(llm.API):
+    """LLM API exposing the benchmark tools."""
+
+    async def async_get_api_instance(self, llm_context: llm.LLMContext) -> llm.APIInstance:
+        """Return the tools."""
+        return llm.APIInstance(
+            self, "Use the tools to control the home.", llm_context, [BenchTool(i) for i in range(BENCH_TOOLS)]
+        )
+
+
+def _last_role(body: dict[str, Any]) -> str:
+    """Return the role of the last message of a request."""
+    return str(body["messages"][-1]["role"])
+
+
+def _chat(_body: dict[str, Any]) -> Reply:
+    """Answer with a few sentences."""
+    return Reply(content=ANSWER, first_token_delay=0.02, chunk_delay=0.001)
+
+
+def _tool_heavy(body: dict[str, Any]) -> Reply:
+    """Call three tools at once, then answer."""
+    if _last_role(body) == "tool":
+        return Reply(content="Готово, всё включено.", first_token_delay=0.02, chunk_delay=0.001)
+    return Reply(
+        tool_calls=[
+            ("BenchTool0", {"name": "Люстра", "area": "Гостиная"}),
+            ("BenchTool1", {"area": "Кухня", "domain": ["light"], "brightness": 40}),
+            ("BenchTool2", {"name": "Вентилятор"}),
+        ],
+        first_token_delay=0.03,
+        chunk_delay=0.001,
+    )
+
+
+class _RateLimited:
+    """Reject every third request with a 429 first."""
+
+    def __init__(self) -> None:
+        """Initialize the counter."""
+        self._requests = 0
+
+    def __call__(self, body: dict[str, Any]) -> Reply:
+        """Answer or reject the request."""
+        self._requests += 1
+        if self._requests % 3 == 0:
+            return Reply(status=429, retry_after=0.01)
+        return _chat(body)
+
+
+def _ai_task(_body: dict[str, Any]) -> Reply:
+    """Answer with structured output."""
+    return Reply(
+        content='{"summary": "Протечка в ванной", "priority": "high", "tags": ["вода", "ванная"]}',
+        first_token_delay=0.05,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """Conversations of the same shape sent to an agent."""
+
+    name: str
+    description: str
+    agent: Literal["chat", "tools", "ai_task"]
+    create_responder: Callable[[], Responder]
+    # Turns of each conversation, every turn after the first one is a follow-up
+    turns: int = 1
+
+
+SCENARIOS = (
+    Scenario("chat", "Streamed answer of three sentences", "chat", lambda: _chat),
+    Scenario("multi_turn", "Six follow-up turns in one conversation", "chat", lambda: _chat, turns=6),
+    Scenario(
+        "tool_heavy", "Three parallel tool calls out of twenty tools, then an answer", "tools", lambda: _tool_heavy
+    ),
+    Scenario("rate_limited", "Every third request is rejected with a 429 and retried", "chat", _RateLimited),
+    Scenario("ai_task", "Streamed structured AI task", "ai_task", lambda: _ai_task),
+)
@@ -16,70 +16,291 @@
 
 from __future__ import annotations
 
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
 from types import MappingProxyType
+from typing import Any
 
+import httpx
 import openai
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import \
+    async_listen_entity_updates
 from homeassistant.config_entries import ConfigEntry, ConfigSubentry
-from homeassistant.const import CONF_API_KEY, CONF_LLM_HASS_API, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.const import (ATTR_DOMAIN, CONF_API_KEY, CONF_LLM_HASS_API,
+                                 EVENT_SERVICE_REGISTERED,
+                                 EVENT_SERVICE_REMOVED, Platform)
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.httpx_client import get_async_client
-
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import \
+    AddConfigEntryEntitiesCallback
+
+from .cache import (ChatMessageStore, ResponseCache, StructureCache,
+                    ToolSpecCache, async_remove_response_cache)
+from .catalog import ModelCatalog
+from .client import create_http_client
+from .coalescer import RequestCoalescer
 from .const import (CLIENT_API_KEY, CLIENT_BASE_URI, CLIENT_PROJECT_ID,
-                    CONF_PROJECT_ID, DOMAIN, LOGGER)
-
-PLATFORMS = (Platform.CONVERSATION, Platform.AI_TASK)
-
-type CloudRUAIConfigEntry = ConfigEntry[openai.AsyncOpenAI]  # type: ignore[name-defined]
+                    CONF_PROJECT_ID, CONF_RESPONSE_CACHE_PERSIST,
+                    CONF_WARMUP_INTERVAL, DEFAULT_RESPONSE_CACHE_PERSIST,
+                    DEFAULT_WARMUP_INTERVAL, DOMAIN, LOGGER)
+from .limiter import RequestLimiter, async_get_limiter, async_release_limiter
+from .routing import ModelRouter
+from .semantic_cache import SemanticCache
+from .services import async_setup_services
+from .stats import (CascadeStats, ConnectionStats, RetryStats, SentenceStats,
+                    ToolCallStats)
+from .timing import LatencyTracker
+from .usage import UsageTracker, async_remove_usage
+from .warmup import ConnectionWarmer
+
+PLATFORMS = (Platform.CONVERSATION, Platform.AI_TASK, Platform.SENSOR)
+
+type EntityFactory = Callable[[CloudRUAIConfigEntry, ConfigSubentry], Entity]
+
+
+@dataclass
+class CloudRUAIRuntimeData:
+    """Runtime data of a Cloud.ru Foundation Models config entry."""
+
+    client: openai.AsyncOpenAI
+    http_client: httpx.AsyncClient
+    connection_stats: ConnectionStats
+    model_catalog: ModelCatalog
+    limiter: RequestLimiter
+    request_coalescer: RequestCoalescer
+    latency: LatencyTracker
+    usage: UsageTracker
+    tool_cache: ToolSpecCache = field(default_factory=ToolSpecCache)
+    structure_cache: StructureCache = field(default_factory=StructureCache)
+    message_store: ChatMessageStore = field(default_factory=ChatMessageStore)
+    tool_call_stats: ToolCallStats = field(default_factory=ToolCallStats)
+    retry_stats: RetryStats = field(default_factory=RetryStats)
+    sentence_stats: SentenceStats = field(default_factory=SentenceStats)
+    router: ModelRouter = field(default_factory=ModelRouter)
+    response_caches: dict[str, ResponseCache] = field(default_factory=dict)
+    semantic_caches: dict[str, SemanticCache] = field(default_factory=dict)
+    cascade_stats: dict[str, CascadeStats] = field(default_factory=dict)
+    platforms: dict[str, list[tuple[EntityFactory, AddConfigEntryEntitiesCallback]]] = field(default_factory=dict)
+    entities: dict[str, list[Entity]] = field(default_factory=dict)
+    subentries: dict[str, tuple[str, Mapping[str, Any]]] = field(default_factory=dict)
+    entry_state: tuple[Mapping[str, Any], Mapping[str, Any]] | None = None
+
+
+type CloudRUAIConfigEntry = ConfigEntry[CloudRUAIRuntimeData]  # type: ignore[name-defined]
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:  # noqa: ARG001
     """Set up Cloud.ru Foundation Models."""
     await async_migrate_integration(hass)
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: CloudRUAIConfigEntry) -> bool:
     """Set up Cloud.ru Foundation Models from a config entry."""
+    start = time.monotonic()
 
+    connection_stats = ConnectionStats()
+    http_client = create_http_client(entry.options, connection_stats)
     client = openai.AsyncOpenAI(
         api_key=entry.data[CONF_API_KEY],
-        http_client=get_async_client(hass),
+        http_client=http_client,
         base_url=CLIENT_BASE_URI,
         default_headers={CLIENT_API_KEY: entry.data[CONF_API_KEY], CLIENT_PROJECT_ID: entry.data[CONF_PROJECT_ID]},
+        # Chat completions are retried by the integration's own policy
+        max_retries=0,
     )
 
     # Cache current platform data which gets added to each request (caching done by library)
     _ = await hass.async_add_executor_job(client.platform_headers)
+    client_ready = time.monotonic()
+
+    entry.runtime_data = CloudRUAIRuntimeData(
+        client=client,
+        http_client=http_client,
+        connection_stats=connection_stats,
+        model_catalog=ModelCatalog(hass, entry, client),
+        limiter=async_get_limiter(hass, entry.data[CONF_PROJECT_ID], entry.entry_id, entry.options),
+        request_coalescer=RequestCoalescer(hass),
+        latency=LatencyTracker(hass),
+        usage=UsageTracker(hass, entry.entry_id),
+        entry_state=(entry.data, entry.options),
+    )
 
-    try:
-        await hass.async_add_executor_job(client.with_options(timeout=10.0).models.list)
-    except openai.AuthenticationError as err:
-        LOGGER.error("Invalid API key: %s", err)
-        return False
-    except openai.OpenAIError as err:
-        raise ConfigEntryNotReady(err) from err
+    # Budgets need the usage of today before the first request
+    await entry.runtime_data.usage.async_load()
+    entry.runtime_data.usage.async_start(entry)
+
+    # Entities are set up from the subentry data right away, the credentials
+    # are checked in the background while fetching the model list
+    entry.async_create_background_task(
+        hass, _async_validate_credentials(hass, entry), f"{DOMAIN} credentials validation"
+    )
+
+    # Formatted tool specs and cached tool plans depend on exposed entities and scripts
+    @callback
+    def _async_invalidate_caches(_event: Event[Any] | None = None) -> None:
+        entry.runtime_data.tool_cache.async_invalidate()
+        for semantic_cache in entry.runtime_data.semantic_caches.values():
+            semantic_cache.async_invalidate()
 
-    entry.runtime_data = client
+    entry.async_on_unload(
+        async_listen_entity_updates(hass, conversation.DOMAIN, _async_invalidate_caches)
+    )
+    for event_type in (EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED):
+        entry.async_on_unload(
+            hass.bus.async_listen(event_type, _async_invalidate_caches, event_filter=_async_is_script_event)
+        )
 
+    if warmup_interval := entry.options.get(CONF_WARMUP_INTERVAL, DEFAULT_WARMUP_INTERVAL):
+        ConnectionWarmer(hass, entry, http_client, connection_stats, float(warmup_interval)).async_start()
+
+    platforms_start = time.monotonic()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Reload when subentry options change
+    # Reconcile entities when subentries change
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
+    end = time.monotonic()
+    LOGGER.debug(
+        "Set up %s in %.3fs (client %.3fs, listeners %.3fs, platforms %.3fs)",
+        entry.title, end - start, client_ready - start, platforms_start - client_ready, end - platforms_start,
+    )
     return True
 
 
+async def _async_validate_credentials(hass: HomeAssistant, entry: CloudRUAIConfigEntry) -> None:
+    """Validate the credentials and raise a repair issue if they are rejected."""
+    start = time.monotonic()
+    issue_id = f"invalid_auth_{entry.entry_id}"
+    try:
+        await entry.runtime_data.model_catalog.async_refresh()
+    except openai.AuthenticationError as err:
+        LOGGER.error("Invalid API key: %s", err)
+        ir.async_create_issue(
+            hass,
+            DOMAIN,
+            issue_id,
+            is_fixable=False,
+            severity=ir.IssueSeverity.ERROR,
+            translation_key="invalid_auth",
+            translation_placeholders={"title": entry.title},
+        )
+        return
+    except openai.OpenAIError as err:
+        # Conversations retry on their own, the model list is refetched by the subentry flows
+        LOGGER.warning("Unable to validate credentials, Cloud.ru is not reachable: %s", err)
+        return
+
+    ir.async_delete_issue(hass, DOMAIN, issue_id)
+    LOGGER.debug("Validated credentials of %s in %.3fs", entry.title, time.monotonic() - start)
+
+
+@callback
+def _async_is_script_event(event_data: dict[str, Any]) -> bool:
+    """Return if a service event belongs to a script."""
+    return bool(event_data[ATTR_DOMAIN] == "script")
+
+
+@callback
+def async_setup_subentry_entities(
+    entry: CloudRUAIConfigEntry,
+    subentry_type: str,
+    factory: EntityFactory,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Add the entities of a subentry type and keep the platform for later subentries.
+
+    A subentry type can have entities on several platforms, each platform
+    adds its own entities.
+    """
+    platform = (factory, async_add_entities)
+    entry.runtime_data.platforms.setdefault(subentry_type, []).append(platform)
+    for subentry in entry.subentries.values():
+        if subentry.subentry_type == subentry_type:
+            _async_add_subentry_entity(entry, subentry, platform)
+
+
+@callback
+def _async_add_subentry_entities(entry: CloudRUAIConfigEntry, subentry: ConfigSubentry) -> None:
+    """Add the entities of a subentry on all platforms."""
+    for platform in entry.runtime_data.platforms.get(subentry.subentry_type, []):
+        _async_add_subentry_entity(entry, subentry, platform)
+
+
+@callback
+def _async_add_subentry_entity(
+    entry: CloudRUAIConfigEntry,
+    subentry: ConfigSubentry,
+    platform: tuple[EntityFactory, AddConfigEntryEntitiesCallback],
+) -> None:
+    """Add the entity of a subentry on a platform."""
+    runtime_data = entry.runtime_data
+    factory, async_add_entities = platform
+    entity = factory(entry, subentry)
+    runtime_data.entities.setdefault(subentry.subentry_id, []).append(entity)
+    runtime_data.subentries[subentry.subentry_id] = (subentry.title, subentry.data)
+    async_add_entities([entity], config_subentry_id=subentry.subentry_id)
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: CloudRUAIConfigEntry) -> None:
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Handle config entry update.
+
+    Only the entities of added, changed or removed subentries are touched, so
+    the other agents and the client connections stay up.
+    """
+    runtime_data = entry.runtime_data
+    # Credentials and connection settings are baked into the client
+    if (entry.data, entry.options) != runtime_data.entry_state:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    removed = 0
+    for subentry_id, state in list(runtime_data.subentries.items()):
+        subentry = entry.subentries.get(subentry_id)
+        if subentry is not None and (subentry.title, subentry.data) == state:
+            continue
+        del runtime_data.subentries[subentry_id]
+        runtime_data.latency.async_remove(subentry_id)
+        runtime_data.router.async_remove(subentry_id)
+        runtime_data.cascade_stats.pop(subentry_id, None)
+        if subentry is None:
+            runtime_data.usage.async_remove(subentry_id)
+        for entity in runtime_data.entities.pop(subentry_id, []):
+            await entity.async_remove()
+        removed += 1
+
+    added = 0
+    for subentry in entry.subentries.values():
+        if subentry.subentry_id not in runtime_data.subentries:
+            _async_add_subentry_entities(entry, subentry)
+            added += 1
+
+    LOGGER.debug("Reconciled subentries of %s: %d removed, %d added", entry.title, removed, added)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: CloudRUAIConfigEntry) -> bool:
     """Unload Cloud.ru Foundation Models."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+    await entry.runtime_data.usage.async_save()
+    await entry.runtime_data.http_client.aclose()
+    async_release_limiter(hass, entry.data[CONF_PROJECT_ID], entry.entry_id)
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: CloudRUAIConfigEntry) -> None:
+    """Remove the repair issues, persisted response caches and usage of a config entry."""
+    ir.async_delete_issue(hass, DOMAIN, f"invalid_auth_{entry.entry_id}")
+    await async_remove_usage(hass, entry.entry_id)
+    for subentry in entry.subentries.values():
+        if subentry.data.get(CONF_RESPONSE_CACHE_PERSIST, DEFAULT_RESPONSE_CACHE_PERSIST):
+            await async_remove_response_cache(hass, subentry.subentry_id)
 
 
 async def async_migrate_integration(hass: HomeAssistant) -> None:
@@ -16,17 +16,24 @@
 
 from __future__ import annotations
 
-from json import JSONDecodeError
+from typing import Any
 
 from homeassistant.components import ai_task, conversation
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import llm
 from homeassistant.helpers.entity_platform import \
     AddConfigEntryEntitiesCallback
-from homeassistant.util.json import json_loads
 
-from . import CloudRUAIConfigEntry
-from .entity import CloudRUAIEntity
+from . import CloudRUAIConfigEntry, async_setup_subentry_entities
+from .cache import CompiledStructure, ResponseCache
+from .const import (CONF_RESPONSE_CACHE, CONF_RESPONSE_CACHE_PERSIST,
+                    CONF_RESPONSE_CACHE_SIZE, CONF_RESPONSE_CACHE_TTL,
+                    DEFAULT_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE_PERSIST,
+                    DEFAULT_RESPONSE_CACHE_SIZE, DEFAULT_RESPONSE_CACHE_TTL,
+                    DOMAIN, LOGGER, STRUCTURE_MAX_REPAIRS)
+from .entity import CloudRUAIEntity, _convert_structure
+from .json_stream import IncrementalJSONParser
 
 
 async def async_setup_entry(
@@ -35,15 +42,7 @@ async def async_setup_entry(
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
     """Set up AI Task entities."""
-
-    for subentry in config_entry.subentries.values():
-        if subentry.subentry_type != "ai_task_data":
-            continue
-
-        async_add_entities(
-            [CloudRUAIAITaskEntity(config_entry, subentry)],
-            config_subentry_id=subentry.subentry_id,
-        )
+    async_setup_subentry_entities(config_entry, "ai_task_data", CloudRUAIAITaskEntity, async_add_entities)
 
 
 class CloudRUAIAITaskEntity(ai_task.AITaskEntity, CloudRUAIEntity):
@@ -52,31 +51,114 @@ class CloudRUAIAITaskEntity(ai_task.AITaskEntity, CloudRUAIEntity):
     _attr_name = None
     _attr_supported_features = ai_task.AITaskEntityFeature.GENERATE_DATA
 
+    async def async_added_to_hass(self) -> None:
+        """Load the response cache when it is enabled."""
+        await super().async_added_to_hass()
+        options = self.subentry.data
+        if not options.get(CONF_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE):
+            return
+        cache = ResponseCache(
+            self.hass,
+            self.subentry.subentry_id,
+            ttl=float(options.get(CONF_RESPONSE_CACHE_TTL, DEFAULT_RESPONSE_CACHE_TTL)),
+            max_size=int(options.get(CONF_RESPONSE_CACHE_SIZE, DEFAULT_RESPONSE_CACHE_SIZE)),
+            persist=options.get(CONF_RESPONSE_CACHE_PERSIST, DEFAULT_RESPONSE_CACHE_PERSIST),
+        )
+        await cache.async_load()
+        self._response_cache = self.entry.runtime_data.response_caches[self.subentry.subentry_id] = cache
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Save the response cache, or remove it with the subentry."""
+        if (cache := self._response_cache) is None:
+            return
+        self.entry.runtime_data.response_caches.pop(self.subentry.subentry_id, None)
+        # The subentry data is updated in place when it is reconfigured
+        options = self.subentry.data
+        if (
+            self.subentry.subentry_id in self.entry.subentries
+            and options.get(CONF_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE)
+            and options.get(CONF_RESPONSE_CACHE_PERSIST, DEFAULT_RESPONSE_CACHE_PERSIST)
+        ):
+            await cache.async_save()
+        else:
+            await cache.async_remove()
+
     async def _async_generate_data(
         self,
         task: ai_task.GenDataTask,
         chat_log: conversation.ChatLog,
     ) -> ai_task.GenDataTaskResult:
-        """Handle a generate data task."""
-
-        await self._async_handle_chat_log(chat_log, task.name, task.structure)
-
-        if not isinstance(chat_log.content[-1], conversation.AssistantContent):
-            raise HomeAssistantError("Last content in chat log is not an AssistantContent")
-
-        text = chat_log.content[-1].content or ""
+        """Handle a generate data task.
 
+        Fields of a structured response that fail validation are requested
+        again on their own, the valid ones are kept. Only responses that pass
+        validation are stored in the response cache.
+        """
         if not task.structure:
+            self._async_cache_response(await self._async_handle_chat_log(chat_log))
             return ai_task.GenDataTaskResult(
                 conversation_id=chat_log.conversation_id,
-                data=text,
+                data=self._async_last_text(chat_log),
+            )
+
+        structure = self.entry.runtime_data.structure_cache.async_compile(
+            task.structure,
+            chat_log.llm_api.custom_serializer if chat_log.llm_api else llm.selector_serializer,
+            _convert_structure,
+        )
+        response = await self._async_handle_chat_log(chat_log, task.name, structure)
+        data, errors = self._async_parse_structured(chat_log, response.parser, structure)
+        if not errors:
+            self._async_cache_response(response)
+
+        for _repair in range(STRUCTURE_MAX_REPAIRS):
+            if not errors:
+                break
+            LOGGER.debug("Requesting invalid fields of %s again: %s", self.entity_id, errors)
+            chat_log.async_add_user_content(conversation.UserContent(content=_repair_prompt(errors)))
+            structure = structure.subset(list(errors))
+            response = await self._async_handle_chat_log(chat_log, task.name, structure)
+            repaired, errors = self._async_parse_structured(chat_log, response.parser, structure)
+            if not errors:
+                self._async_cache_response(response)
+            data.update(repaired)
+
+        if errors:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_structured_response",
+                translation_placeholders={"fields": ", ".join(errors)},
             )
-        try:
-            data = json_loads(text)
-        except JSONDecodeError as err:
-            raise HomeAssistantError("Error with Cloud.ru Foundation Models structured response") from err
 
         return ai_task.GenDataTaskResult(
             conversation_id=chat_log.conversation_id,
             data=data,
         )
+
+    @callback
+    def _async_last_text(self, chat_log: conversation.ChatLog) -> str:
+        """Return the text of the last response."""
+        if not isinstance(chat_log.content[-1], conversation.AssistantContent):
+            raise HomeAssistantError("Last content in chat log is not an AssistantContent")
+        return chat_log.content[-1].content or ""
+
+    @callback
+    def _async_parse_structured(
+        self,
+        chat_log: conversation.ChatLog,
+        parser: IncrementalJSONParser | None,
+        structure: CompiledStructure,
+    ) -> tuple[dict[str, Any], dict[str, str]]:
+        """Return the valid fields of the last response and the errors of the others."""
+        text = self._async_last_text(chat_log)
+        if parser is None or not parser.complete:
+            error = parser.error if parser is not None else None
+            LOGGER.debug("Structured response of %s is not valid JSON: %s", self.entity_id, error or repr(text))
+            return {}, dict.fromkeys(structure.fields, "the response is not valid JSON")
+        return structure.validate(parser.result())
+
+
+def _repair_prompt(errors: dict[str, str]) -> str:
+    """Return the request for the fields that failed validation."""
+    fields = "\n".join(f"- {name}: {error}" for name, error in errors.items())
+    return f"These fields of the response are invalid:\n{fields}\nRespond again with only these fields."
@@ -0,0 +1,520 @@
+"""Caches for the Cloud.ru Foundation Models integration."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from types import BuiltinFunctionType, FunctionType, MethodType
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import conversation
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import llm
+from homeassistant.helpers.storage import Store
+from openai.types.chat import (ChatCompletionMessage,
+                               ChatCompletionMessageParam,
+                               ChatCompletionToolParam)
+
+from .const import (DOMAIN, LOGGER, MESSAGE_STORE_MAX_CONVERSATIONS,
+                    MESSAGE_STORE_TTL, RESPONSE_CACHE_SAVE_DELAY,
+                    STRUCTURE_CACHE_MAX_SIZE, TOOL_CACHE_MAX_SIZE)
+
+_MAX_FINGERPRINT_DEPTH = 32
+
+RESPONSE_CACHE_STORAGE_VERSION = 1
+
+# Matches the line of llm.DATE_TIME_PROMPT, keeping the date
+
+type ToolFormatter = Callable[[llm.Tool, Callable[[Any], Any] | None], ChatCompletionToolParam]
+type MessageConverter = Callable[[conversation.Content, str | None], ChatCompletionMessageParam | None]
+
+
+def _schema_fingerprint(value: Any, depth: int = 0, path: frozenset[int] = frozenset()) -> str:
+    """Return a stable textual fingerprint of a voluptuous schema.
+
+    Compiled validators like vol.All keep a reference back to the schema
+    they belong to, so objects already on the current path are not walked
+    again.
+    """
+    if depth > _MAX_FINGERPRINT_DEPTH:
+        return "..."
+    depth += 1
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return repr(value)
+    if id(value) in path:
+        return "<cycle>"
+    path = path | {id(value)}
+    if isinstance(value, vol.Schema):
+        return _schema_fingerprint(value.schema, depth, path)
+    if isinstance(value, vol.Marker):
+        default = getattr(value, "default", vol.UNDEFINED)
+        default_repr = repr(default()) if callable(default) else ""
+        return (
+            f"{type(value).__name__}({_schema_fingerprint(value.schema, depth, path)},"
+            f"{value.description!r},{default_repr})"
+        )
+    if isinstance(value, dict):
+        items = ",".join(
+            f"{_schema_fingerprint(key, depth, path)}:{_schema_fingerprint(item, depth, path)}"
+            for key, item in value.items()
+        )
+        return f"{{{items}}}"
+    if isinstance(value, (list, tuple)):
+        items = ",".join(_schema_fingerprint(item, depth, path) for item in value)
+        return f"{type(value).__name__}[{items}]"
+    if isinstance(value, (set, frozenset)):
+        items = ",".join(sorted(_schema_fingerprint(item, depth, path) for item in value))
+        return f"{type(value).__name__}[{items}]"
+    if isinstance(value, (type, FunctionType, BuiltinFunctionType)):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, MethodType):
+        return f"{value.__module__}.{value.__qualname__}({_schema_fingerprint(value.__self__, depth, path)})"
+    if isinstance(value, partial):
+        return (
+            f"partial({_schema_fingerprint(value.func, depth, path)},"
+            f"{_schema_fingerprint(value.args, depth, path)},{_schema_fingerprint(value.keywords, depth, path)})"
+        )
+    if hasattr(value, "__dict__"):
+        # Private attributes hold compiled state, not the declared schema
+        attributes = {key: item for key, item in vars(value).items() if not key.startswith("_")}
+        return f"{type(value).__qualname__}({_schema_fingerprint(attributes, depth, path)})"
+    # The default repr holds the address of the object, which differs between turns
+    if callable(value) or type(value).__repr__ is object.__repr__:
+        return f"{type(value).__module__}.{type(value).__qualname__}"
+    return repr(value)
+
+
+class ToolSpecCache:
+    """Formatted tool specifications reused across conversation turns.
+
+    Specs are keyed by the LLM API, tool name, description and a fingerprint
+    of the parameters schema, so a changed schema never hits a stale entry.
+    """
+
+    def __init__(self, max_size: int = TOOL_CACHE_MAX_SIZE) -> None:
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._specs: OrderedDict[tuple[str, str, str, str], ChatCompletionToolParam] = OrderedDict()
+        self._fingerprints: dict[int, tuple[weakref.ref[vol.Schema], str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @callback
+    def async_format_tools(
+        self, llm_api: llm.APIInstance, formatter: ToolFormatter
+    ) -> list[ChatCompletionToolParam]:
+        """Return formatted specs for all tools of the API instance."""
+        hits, misses = self.hits, self.misses
+        tools = [self._async_format_tool(llm_api, tool, formatter) for tool in llm_api.tools]
+        LOGGER.debug(
+            "Tool specs for %s: %d cached, %d formatted",
+            llm_api.api.id, self.hits - hits, self.misses - misses,
+        )
+        return tools
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Drop all cached specs."""
+        if not self._specs and not self._fingerprints:
+            return
+        self._specs.clear()
+        self._fingerprints.clear()
+        self.invalidations += 1
+        LOGGER.debug("Tool spec cache invalidated")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._specs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "invalidations": self.invalidations,
+        }
+
+    def _async_format_tool(
+        self, llm_api: llm.APIInstance, tool: llm.Tool, formatter: ToolFormatter
+    ) -> ChatCompletionToolParam:
+        """Return a formatted tool spec, formatting it on a cache miss."""
+        key = (llm_api.api.id, tool.name, tool.description or "", self._async_fingerprint(tool.parameters))
+
+        if (spec := self._specs.get(key)) is not None:
+            self._specs.move_to_end(key)
+            self.hits += 1
+            return spec
+
+        self.misses += 1
+        spec = formatter(tool, llm_api.custom_serializer)
+        self._specs[key] = spec
+        if len(self._specs) > self._max_size:
+            self._specs.popitem(last=False)
+        return spec
+
+    def _async_fingerprint(self, parameters: vol.Schema) -> str:
+        """Return the fingerprint of a parameters schema.
+
+        Schemas that are kept alive between turns (e.g. script tools) are only
+        walked once.
+        """
+        if (cached := self._fingerprints.get(id(parameters))) and cached[0]() is parameters:
+            return cached[1]
+
+        fingerprint = _schema_fingerprint(parameters)
+        if len(self._fingerprints) >= self._max_size:
+            self._fingerprints.clear()
+        self._fingerprints[id(parameters)] = (weakref.ref(parameters), fingerprint)
+        return fingerprint
+
+
+type StructureConverter = Callable[[vol.Schema, Callable[[Any], Any] | None], dict[str, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledStructure:
+    """A structured output schema converted for the API, with its local validator.
+
+    Optional fields are sent to the API as required but nullable, so null
+    values of optional fields are kept without validating them.
+    """
+
+    schema: dict[str, Any]
+    validator: vol.Schema
+
+    @property
+    def fields(self) -> list[str]:
+        """Return the names of the top-level fields."""
+        return [str(key) for key in self.validator.schema]
+
+    def validate(self, data: Any) -> tuple[dict[str, Any], dict[str, str]]:
+        """Return the valid fields of a response and the errors of the others.
+
+        Valid fields keep the values of the response, selectors would coerce them.
+        """
+        if not isinstance(data, dict):
+            return {}, dict.fromkeys(self.fields, "expected a JSON object")
+
+        optional = {str(key) for key in self.validator.schema if not isinstance(key, vol.Required)}
+        data = {key: value for key, value in data.items() if key in self.validator.schema}
+        try:
+            self.validator({key: value for key, value in data.items() if not (value is None and key in optional)})
+        except vol.MultipleInvalid as err:
+            errors: dict[str, str] = {}
+            for error in err.errors:
+                if not error.path:
+                    return {}, dict.fromkeys(self.fields, error.msg)
+                errors.setdefault(str(error.path[0]), error.msg)
+            return {key: value for key, value in data.items() if key not in errors}, errors
+        return data, {}
+
+    def subset(self, fields: list[str]) -> CompiledStructure:
+        """Return the structure of some of the fields."""
+        properties = self.schema.get("properties", {})
+        return CompiledStructure(
+            schema={
+                **self.schema,
+                "properties": {name: properties[name] for name in fields if name in properties},
+                "required": [name for name in self.schema.get("required", []) if name in fields],
+            },
+            validator=vol.Schema(
+                {key: value for key, value in self.validator.schema.items() if str(key) in fields},
+                extra=self.validator.extra,
+            ),
+        )
+
+
+class StructureCache:
+    """Structured output schemas reused across AI tasks.
+
+    Automations build a new schema for every task, so structures are keyed
+    by a fingerprint of the schema and the serializer converting it.
+    """
+
+    def __init__(self, max_size: int = STRUCTURE_CACHE_MAX_SIZE) -> None:
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._structures: OrderedDict[tuple[str, str], CompiledStructure] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @callback
+    def async_compile(
+        self,
+        structure: vol.Schema,
+        custom_serializer: Callable[[Any], Any] | None,
+        converter: StructureConverter,
+    ) -> CompiledStructure:
+        """Return the compiled structure, converting it on a cache miss."""
+        serializer = (
+            f"{custom_serializer.__module__}.{custom_serializer.__qualname__}" if custom_serializer else ""
+        )
+        key = (_schema_fingerprint(structure), serializer)
+        if (compiled := self._structures.get(key)) is not None:
+            self._structures.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        compiled = CompiledStructure(converter(structure, custom_serializer), structure)
+        self._structures[key] = compiled
+        if len(self._structures) > self._max_size:
+            self._structures.popitem(last=False)
+        return compiled
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._structures),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+@dataclass(slots=True)
+class _ConvertedChatLog:
+    """Messages converted so far for a single conversation."""
+
+    system_key: tuple[str | None, str | None]
+    system_message: ChatCompletionMessageParam | None
+    messages: list[ChatCompletionMessageParam]
+    converted: int
+    last_content: conversation.Content | None
+    last_used: float
+
+
+class ChatMessageStore:
+    """Converted chat history per conversation.
+
+    Every turn only converts the content that was added to the chat log since
+    the previous turn. Idle conversations expire after a TTL, and the least
+    recently used ones are evicted when the store is full.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = MESSAGE_STORE_MAX_CONVERSATIONS,
+        ttl: float = MESSAGE_STORE_TTL,
+    ) -> None:
+        """Initialize the store."""
+        self._max_conversations = max_conversations
+        self._ttl = ttl
+        self._conversations: OrderedDict[str, _ConvertedChatLog] = OrderedDict()
+        self.converted = 0
+        self.reused = 0
+        self.rebuilds = 0
+        self.evictions = 0
+
+    @callback
+    def async_get_messages(
+        self,
+        chat_log: conversation.ChatLog,
+        converter: MessageConverter,
+        system_prompt_override: str | None = None,
+    ) -> list[ChatCompletionMessageParam]:
+        """Return the chat log converted to API messages."""
+        now = time.monotonic()
+        self._async_expire(now)
+
+        content = chat_log.content
+        has_system = bool(content) and content[0].role == "system"
+        start = 1 if has_system else 0
+
+        entry = self._conversations.get(chat_log.conversation_id)
+        if entry is not None and not (
+            entry.converted <= len(content)
+            and (entry.converted == start or content[entry.converted - 1] is entry.last_content)
+        ):
+            # History was rewritten (e.g. the chat log was recreated)
+            self.rebuilds += 1
+            entry = None
+
+        if entry is None:
+            entry = _ConvertedChatLog(
+                system_key=(None, None),
+                system_message=None,
+                messages=[],
+                converted=start,
+                last_content=None,
+                last_used=now,
+            )
+            self._conversations[chat_log.conversation_id] = entry
+
+        if has_system:
+            system_key = (content[0].content, system_prompt_override)
+            if entry.system_message is None or system_key != entry.system_key:
+                entry.system_message = converter(content[0], system_prompt_override)
+                entry.system_key = system_key
+                self.converted += 1
+
+        self.reused += len(entry.messages)
+        for item in content[entry.converted:]:
+            if (message := converter(item, None)) is not None:
+                entry.messages.append(message)
+            self.converted += 1
+        entry.converted = len(content)
+        entry.last_content = content[-1] if len(content) > start else None
+        entry.last_used = now
+        self._conversations.move_to_end(chat_log.conversation_id)
+
+        if len(self._conversations) > self._max_conversations:
+            self._conversations.popitem(last=False)
+            self.evictions += 1
+
+        if entry.system_message is None:
+            return list(entry.messages)
+        return [entry.system_message, *entry.messages]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return store statistics."""
+        return {
+            "conversations": len(self._conversations),
+            "converted": self.converted,
+            "reused": self.reused,
+            "rebuilds": self.rebuilds,
+            "evictions": self.evictions,
+        }
+
+    def _async_expire(self, now: float) -> None:
+        """Evict conversations that were idle for longer than the TTL."""
+        while self._conversations:
+            conversation_id, entry = next(iter(self._conversations.items()))
+            if now - entry.last_used < self._ttl:
+                break
+            del self._conversations[conversation_id]
+            self.evictions += 1
+
+
+def _response_store(hass: HomeAssistant, subentry_id: str) -> Store[dict[str, Any]]:
+    """Return the storage of the persisted responses of a subentry."""
+    return Store(hass, RESPONSE_CACHE_STORAGE_VERSION, f"{DOMAIN}.response_cache.{subentry_id}", private=True)
+
+
+async def async_remove_response_cache(hass: HomeAssistant, subentry_id: str) -> None:
+    """Remove the persisted responses of a subentry."""
+    await _response_store(hass, subentry_id).async_remove()
+
+
+class ResponseCache:
+    """Final responses of AI tasks keyed by the request.
+
+    Entries expire after a TTL and the least recently used ones are evicted
+    when the cache is full. With persistence enabled the cache survives
+    restarts in Home Assistant storage.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        subentry_id: str,
+        ttl: float,
+        max_size: int,
+        persist: bool,
+    ) -> None:
+        """Initialize the cache."""
+        self._ttl = ttl
+        self._max_size = max_size
+        self._store: Store[dict[str, Any]] | None = None
+        if persist:
+            self._store = _response_store(hass, subentry_id)
+        # Wall clock expiry times, they are persisted across restarts
+        self._responses: OrderedDict[str, tuple[float, ChatCompletionMessage]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def async_load(self) -> None:
+        """Load the persisted responses."""
+        if self._store is None or (data := await self._store.async_load()) is None:
+            return
+        now = time.time()
+        for key, expires, message in data["responses"]:
+            if expires > now:
+                self._responses[key] = (expires, ChatCompletionMessage.model_validate(message))
+        self._async_evict()
+        LOGGER.debug("Loaded %d cached responses", len(self._responses))
+
+    @callback
+    def async_get(self, key: str) -> ChatCompletionMessage | None:
+        """Return a cached response."""
+        if (cached := self._responses.get(key)) is None or cached[0] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._responses.move_to_end(key)
+        return cached[1]
+
+    @callback
+    def async_put(self, key: str, message: ChatCompletionMessage) -> None:
+        """Cache a response."""
+        self._responses[key] = (time.time() + self._ttl, message)
+        self._responses.move_to_end(key)
+        self._async_evict()
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, RESPONSE_CACHE_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Write pending changes to storage."""
+        if self._store is not None:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the persisted responses."""
+        self._responses.clear()
+        if self._store is not None:
+            await self._store.async_remove()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._responses),
+            "persistent": self._store is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "evictions": self.evictions,
+        }
+
+    @callback
+    def _async_evict(self) -> None:
+        """Drop expired responses and the least recently used ones over the size limit."""
+        now = time.time()
+        for key in [key for key, (expires, _) in self._responses.items() if expires <= now]:
+            del self._responses[key]
+            self.evictions += 1
+        while len(self._responses) > self._max_size:
+            self._responses.popitem(last=False)
+            self.evictions += 1
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the responses to persist, least recently used first."""
+        return {
+            "responses": [
+                [key, expires, message.model_dump(exclude_none=True)]
+                for key, (expires, message) in self._responses.items()
+            ]
+        }
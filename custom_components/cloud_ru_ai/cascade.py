@@ -0,0 +1,148 @@
+"""Two-tier model cascade for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, AsyncIterable
+from enum import StrEnum
+from typing import Any, cast
+
+from homeassistant.components import conversation
+from homeassistant.core import callback
+from openai.types.chat import ChatCompletionToolParam
+
+from .const import CASCADE_MAX_ITERATIONS, LOGGER
+from .routing import Route
+
+ESCALATE_TOOL_NAME = "escalate"
+ESCALATE_TOOL: ChatCompletionToolParam = {
+    "type": "function",
+    "function": {
+        "name": ESCALATE_TOOL_NAME,
+        "description": (
+            "Hand the request over to a more capable assistant. Call it instead of answering when the request "
+            "is ambiguous, needs several steps of reasoning, or you are not sure which tools to use"
+        ),
+        "parameters": {"type": "object", "properties": {}},
+    },
+}
+
+
+class Escalation(StrEnum):
+    """Reason to hand a turn over to the large model."""
+
+    UNCERTAIN = "uncertain"
+    INVALID_TOOL_CALL = "invalid_tool_call"
+    ITERATION_LIMIT = "iteration_limit"
+    # The small model failed and the request fell back to the large one
+    ERROR = "error"
+
+
+class CascadeTurn:
+    """Tier of a turn that starts on the small model."""
+
+    def __init__(self, model: str, large: Route) -> None:
+        """Start the turn on the small model."""
+        self.model = model
+        self.large = large
+        self.iterations = 0
+        self.escalation: Escalation | None = None
+        self.escalated = False
+
+    @property
+    def route(self) -> Route:
+        """Return the candidates of the small tier.
+
+        The large model stays as a fallback, so the turn is still answered
+        when the small model fails.
+        """
+        return Route(list(dict.fromkeys([self.model, *self.large.models])), self.model)
+
+    def model_args(self, model: str, model_args: dict[str, Any]) -> dict[str, Any]:
+        """Return the request arguments of a model, offering the escalation tool to the small one."""
+        if model != self.model:
+            return model_args
+        tools = model_args.get("tools")
+        tools = [*tools, ESCALATE_TOOL] if isinstance(tools, list) else [ESCALATE_TOOL]
+        return {**model_args, "tools": tools, "tool_choice": "auto"}
+
+    @callback
+    def async_escalate(self, reason: Escalation) -> None:
+        """Escalate the turn at the end of the current request."""
+        if self.escalation is None:
+            LOGGER.debug("Escalating from %s to %s: %s", self.model, self.large.model, reason)
+            self.escalation = reason
+
+    @callback
+    def async_end_iteration(self, route: Route, tool_results_pending: bool) -> bool:
+        """Count a request of the small tier and return if the large model has to answer now.
+
+        Turns that escalate with tool results pending continue on the large
+        model anyway.
+        """
+        if self.escalated:
+            return False
+        self.iterations += 1
+        if route.model != self.model:
+            self.async_escalate(Escalation.ERROR)
+        elif tool_results_pending and self.iterations >= CASCADE_MAX_ITERATIONS:
+            self.async_escalate(Escalation.ITERATION_LIMIT)
+        if self.escalation is None:
+            return False
+        self.escalated = True
+        return self.escalation is Escalation.UNCERTAIN
+
+
+async def async_watch_escalation(
+    stream: AsyncIterable[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict],
+    cascade: CascadeTurn,
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+    """Pass on the deltas of the small model, catching the signals to escalate.
+
+    Calls of the escalation tool are taken out, Home Assistant does not know it.
+    The text of the small model is held back until its response ends, and is
+    dropped if the turn escalates, so it is neither shown nor spoken.
+    """
+    text: list[str] = []
+    async for delta in stream:
+        if delta.keys() <= {"role", "content"}:
+            delta = cast(conversation.AssistantContentDeltaDict, delta)
+            if "role" in delta:
+                yield {"role": delta["role"]}
+            if content := delta.get("content"):
+                text.append(content)
+            continue
+        if delta.get("role") == "tool_result":
+            # Only tool calls with malformed arguments get their result from the stream
+            if delta.get("tool_name") == ESCALATE_TOOL_NAME:
+                cascade.async_escalate(Escalation.UNCERTAIN)
+                continue
+            cascade.async_escalate(Escalation.INVALID_TOOL_CALL)
+        elif tool_calls := delta.get("tool_calls"):
+            if any(tool_call.tool_name == ESCALATE_TOOL_NAME for tool_call in tool_calls):
+                cascade.async_escalate(Escalation.UNCERTAIN)
+                tool_calls = [tool_call for tool_call in tool_calls if tool_call.tool_name != ESCALATE_TOOL_NAME]
+                if not tool_calls:
+                    continue
+                delta = {**delta, "tool_calls": tool_calls}
+        yield delta
+
+    if cascade.escalation is not None:
+        if text:
+            LOGGER.debug("Dropped the answer of %s on escalation", cascade.model)
+        return
+    if text:
+        yield {"content": "".join(text)}
@@ -0,0 +1,155 @@
+"""Model catalogue of Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import openai
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from openai.types import Model
+
+from .const import (DOMAIN, LOGGER, MODEL_CATALOG_MAX_RETRIES,
+                    MODEL_CATALOG_TIMEOUT, MODEL_CATALOG_TTL)
+
+
+@dataclass(frozen=True, slots=True)
+class ModelInfo:
+    """Capabilities of a model."""
+
+    id: str
+    type: str | None
+    is_billable: bool
+    function_calling: bool
+    structure_output: bool
+
+    @classmethod
+    def from_model(cls, model: Model) -> ModelInfo:
+        """Parse the capability flags of a listed model."""
+        metadata = getattr(model, "metadata", None) or {}
+        return cls(
+            id=model.id,
+            type=metadata.get("type"),
+            is_billable=bool(metadata.get("is_billable", True)),
+            function_calling=bool(getattr(model, "function_calling", False)),
+            structure_output=bool(getattr(model, "structure_output", False)),
+        )
+
+    @property
+    def is_llm(self) -> bool:
+        """Return if the model is a chat model."""
+        return self.type == "llm"
+
+
+class ModelCatalog:
+    """Model list of a config entry shared by setup and the subentry flows.
+
+    A stale catalogue is served immediately while it is refreshed in the
+    background. Concurrent refreshes share a single API request.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        client: openai.AsyncOpenAI,
+        ttl: float = MODEL_CATALOG_TTL,
+    ) -> None:
+        """Initialize the catalogue."""
+        self._hass = hass
+        self._entry = entry
+        self._client = client
+        self._ttl = ttl
+        self._models: dict[str, ModelInfo] = {}
+        self._updated: float | None = None
+        self._refresh_task: asyncio.Task[dict[str, ModelInfo]] | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def is_stale(self) -> bool:
+        """Return if the catalogue should be refreshed."""
+        return self._updated is None or time.monotonic() - self._updated > self._ttl
+
+    async def async_get_models(self) -> dict[str, ModelInfo]:
+        """Return the models, fetching them only if nothing is cached yet."""
+        if not self._models:
+            return await self.async_refresh()
+        if self.is_stale:
+            self.async_schedule_refresh()
+        return self._models
+
+    @callback
+    def async_get_model(self, model_id: str) -> ModelInfo | None:
+        """Return a cached model without fetching the list."""
+        return self._models.get(model_id)
+
+    async def async_refresh(self) -> dict[str, ModelInfo]:
+        """Fetch the model list, joining a refresh that is already running."""
+        if self._refresh_task is None:
+            self._refresh_task = self._hass.async_create_task(
+                self._async_fetch(), f"{DOMAIN} model catalogue refresh", eager_start=False
+            )
+        return await self._refresh_task
+
+    @callback
+    def async_schedule_refresh(self) -> None:
+        """Refresh the catalogue in the background."""
+        if self._refresh_task is None:
+            self._entry.async_create_background_task(
+                self._hass, self._async_background_refresh(), f"{DOMAIN} model catalogue background refresh"
+            )
+
+    async def _async_background_refresh(self) -> None:
+        """Refresh the catalogue, logging failures."""
+        try:
+            await self.async_refresh()
+        except openai.OpenAIError as err:
+            LOGGER.warning("Failed to fetch models: %s", err)
+
+    async def _async_fetch(self) -> dict[str, ModelInfo]:
+        """Fetch the model list from the API."""
+        try:
+            response = await self._client.with_options(
+                timeout=MODEL_CATALOG_TIMEOUT, max_retries=MODEL_CATALOG_MAX_RETRIES
+            ).models.list()
+        except openai.OpenAIError as err:
+            self.failures += 1
+            if not self._models:
+                raise
+            LOGGER.warning("Failed to refresh models, using the cached list: %s", err)
+            return self._models
+        finally:
+            self._refresh_task = None
+
+        self._models = {model.id: ModelInfo.from_model(model) for model in response.data}
+        self._updated = time.monotonic()
+        self.refreshes += 1
+        LOGGER.debug("Fetched %d models", len(self._models))
+        return self._models
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the catalogue statistics."""
+        return {
+            "models": len(self._models),
+            "age": round(time.monotonic() - self._updated, 1) if self._updated is not None else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
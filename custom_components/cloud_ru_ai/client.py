@@ -0,0 +1,117 @@
+"""HTTP client for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import importlib.util
+import time
+from collections.abc import Mapping
+from typing import Any
+
+import httpx
+from homeassistant.helpers.httpx_client import SERVER_SOFTWARE, USER_AGENT
+from homeassistant.util.ssl import (SSL_ALPN_HTTP11, SSL_ALPN_HTTP11_HTTP2,
+                                    SSLCipherList, client_context)
+
+from .const import (CONF_CONNECT_TIMEOUT, CONF_HTTP2, CONF_KEEPALIVE_EXPIRY,
+                    CONF_MAX_CONNECTIONS, CONF_READ_TIMEOUT,
+                    DEFAULT_CONNECT_TIMEOUT, DEFAULT_HTTP2,
+                    DEFAULT_KEEPALIVE_EXPIRY, DEFAULT_MAX_CONNECTIONS,
+                    DEFAULT_READ_TIMEOUT, LOGGER)
+from .stats import ConnectionStats
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Request extension marking warm-up requests, they are left out of the request stats
+WARMUP_EXTENSION = "cloud_ru_ai_warm_up"
+
+
+class _StatsTransport(httpx.AsyncBaseTransport):
+    """Transport counting requests, new connections, TLS handshakes and latency."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: ConnectionStats) -> None:
+        """Initialize the transport."""
+        self._transport = transport
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, tracing the connection it uses."""
+        stats = self._stats
+        warm_up = bool(request.extensions.get(WARMUP_EXTENSION))
+        cold = False
+
+        async def _async_trace(event_name: str, info: dict[str, Any]) -> None:  # noqa: ARG001
+            """Handle a connection pool trace event."""
+            nonlocal cold
+            if warm_up:
+                return
+            if event_name == "connection.connect_tcp.complete":
+                cold = True
+                stats.async_record_connection()
+            elif event_name == "connection.start_tls.complete":
+                stats.async_record_tls_handshake()
+
+        if warm_up:
+            stats.async_record_activity()
+        else:
+            stats.async_record_request()
+        request.extensions["trace"] = _async_trace
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        if not warm_up:
+            stats.async_record_latency(time.monotonic() - start, cold)
+        return response
+
+    async def aclose(self) -> None:
+        """Close the connections."""
+        await self._transport.aclose()
+
+
+def create_http_client(
+    options: Mapping[str, Any],
+    stats: ConnectionStats,
+) -> httpx.AsyncClient:
+    """Create an HTTP client tuned for long-lived streaming connections.
+
+    Unlike the shared Home Assistant client, it is owned by the config entry
+    and has to be closed on unload.
+    """
+    http2 = options.get(CONF_HTTP2, DEFAULT_HTTP2)
+    if http2 and not HTTP2_AVAILABLE:
+        LOGGER.warning("HTTP/2 requires the h2 package, falling back to HTTP/1.1")
+        http2 = False
+
+    max_connections = int(options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS))
+    transport = httpx.AsyncHTTPTransport(
+        verify=client_context(SSLCipherList.PYTHON_DEFAULT, SSL_ALPN_HTTP11_HTTP2 if http2 else SSL_ALPN_HTTP11),
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(options.get(CONF_KEEPALIVE_EXPIRY, DEFAULT_KEEPALIVE_EXPIRY)),
+        ),
+    )
+
+    # The read timeout bounds the gaps between streamed chunks, not the whole response
+    return httpx.AsyncClient(
+        transport=_StatsTransport(transport, stats),
+        timeout=httpx.Timeout(
+            float(options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT)),
+            read=float(options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT)),
+        ),
+        headers={USER_AGENT: SERVER_SOFTWARE},
+    )
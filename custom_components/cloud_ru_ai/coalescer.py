@@ -0,0 +1,136 @@
+"""Request coalescing for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from collections.abc import AsyncGenerator, AsyncIterable, Callable, Mapping
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.json import json_dumps_sorted
+from openai._types import NOT_GIVEN
+
+from .const import DOMAIN, LOGGER
+
+# Request arguments that differ between callers without changing the response
+_IGNORED_ARGS = frozenset({"user", "stream", "stream_options"})
+_DATE_TIME_PROMPT_RE = re.compile(r"^Current time is [\d:]+\. (Today's date is [\d-]+\.)$", re.MULTILINE)
+
+
+def request_key(model_args: Mapping[str, Any]) -> str:
+    """Return a hash of the request arguments identifying identical requests.
+
+    Home Assistant adds the current time to the system prompt of every task.
+    The time of day is left out so identical tasks match across seconds, the
+    date is kept so answers about today are not replayed tomorrow.
+    """
+    args = {key: value for key, value in model_args.items() if key not in _IGNORED_ARGS and value is not NOT_GIVEN}
+    messages = args.get("messages")
+    if messages and messages[0]["role"] == "system" and isinstance(content := messages[0].get("content"), str):
+        args["messages"] = [{**messages[0], "content": _DATE_TIME_PROMPT_RE.sub(r"\1", content)}, *messages[1:]]
+    return hashlib.sha256(json_dumps_sorted(args).encode()).hexdigest()
+
+
+class _SharedStream[T]:
+    """Items of a stream kept for every caller reading it."""
+
+    def __init__(self) -> None:
+        """Initialize the stream."""
+        self.items: list[T] = []
+        self.done = False
+        self.error: Exception | None = None
+        self.changed = asyncio.Event()
+
+    async def async_run(self, stream: AsyncIterable[T]) -> None:
+        """Read the stream to the end."""
+        try:
+            async for item in stream:
+                self.items.append(item)
+                self._async_notify()
+        except asyncio.CancelledError:
+            self.error = HomeAssistantError("Request cancelled")
+            raise
+        except Exception as err:
+            self.error = err
+        finally:
+            self.done = True
+            self._async_notify()
+
+    @callback
+    def _async_notify(self) -> None:
+        """Wake up the callers waiting for more items."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class RequestCoalescer:
+    """Share a single in-flight streamed request between identical concurrent callers.
+
+    The request is read in its own task, so a caller being cancelled does
+    not fail the others reading the same response. Callers joining late get
+    the items received so far first.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the coalescer."""
+        self._hass = hass
+        self._in_flight: dict[str, _SharedStream[Any]] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def async_stream[T](
+        self, key: str, request: Callable[[], AsyncIterable[T]]
+    ) -> AsyncGenerator[T, None]:
+        """Stream a response, or join the identical one already in flight."""
+        if (shared := self._in_flight.get(key)) is None:
+            self.requests += 1
+            shared = self._in_flight[key] = _SharedStream()
+            self._hass.async_create_task(
+                self._async_run(key, shared, request), f"{DOMAIN} coalesced request", eager_start=False
+            )
+        else:
+            self.coalesced += 1
+            LOGGER.debug("Joining an identical request in flight")
+
+        index = 0
+        while True:
+            while index < len(shared.items):
+                yield shared.items[index]
+                index += 1
+            if shared.done:
+                if shared.error is not None:
+                    raise shared.error
+                return
+            await shared.changed.wait()
+
+    async def _async_run[T](self, key: str, shared: _SharedStream[T], request: Callable[[], AsyncIterable[T]]) -> None:
+        """Read the response and forget it once done."""
+        try:
+            await shared.async_run(request())
+        finally:
+            del self._in_flight[key]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the coalescing statistics."""
+        return {
+            "in_flight": len(self._in_flight),
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+        }
@@ -23,29 +23,53 @@ import openai
 import voluptuous as vol
 from homeassistant.config_entries import (SOURCE_USER, ConfigEntry, ConfigFlow,
                                           ConfigFlowResult, ConfigSubentryFlow,
-                                          SubentryFlowResult)
+                                          OptionsFlow, SubentryFlowResult)
 from homeassistant.const import CONF_API_KEY, CONF_LLM_HASS_API
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import llm
 from homeassistant.helpers.httpx_client import get_async_client
 from homeassistant.helpers.selector import (NumberSelector,
                                             NumberSelectorConfig,
+                                            NumberSelectorMode,
                                             SelectOptionDict, SelectSelector,
                                             SelectSelectorConfig,
                                             SelectSelectorMode,
                                             TemplateSelector)
 
+from .catalog import ModelCatalog
 from .const import (CLIENT_API_KEY, CLIENT_BASE_URI, CLIENT_PROJECT_ID,
-                    CONF_CHAT_MODEL, CONF_MAX_TOKENS,
-                    CONF_NO_HA_DEFAULT_PROMPT, CONF_PROJECT_ID, CONF_PROMPT,
-                    CONF_RECOMMENDED, CONF_TEMPERATURE, CONF_THINKING_MODE,
-                    CONF_TOP_P, DEFAULT_CHAT_MODEL,
-                    DEFAULT_INSTRUCTIONS_PROMPT_RU,
-                    DEFAULT_NO_HA_DEFAULT_PROMPT, DEFAULT_THINKING_MODE,
+                    CONF_BUDGET_FALLBACK_MODEL, CONF_CASCADE_MODEL,
+                    CONF_CHAT_MODEL, CONF_COMPLETION_TOKEN_PRICE,
+                    CONF_CONNECT_TIMEOUT, CONF_CONTEXT_BUDGET,
+                    CONF_DAILY_TOKEN_BUDGET, CONF_HTTP2, CONF_KEEPALIVE_EXPIRY,
+                    CONF_MAX_CONNECTIONS, CONF_MAX_IN_FLIGHT, CONF_MAX_TOKENS,
+                    CONF_NO_HA_DEFAULT_PROMPT, CONF_PARALLEL_TOOL_CALLS,
+                    CONF_PROJECT_ID, CONF_PROMPT, CONF_PROMPT_TOKEN_PRICE,
+                    CONF_RATE_LIMIT, CONF_READ_TIMEOUT, CONF_RECOMMENDED,
+                    CONF_RESPONSE_CACHE, CONF_RESPONSE_CACHE_PERSIST,
+                    CONF_RESPONSE_CACHE_SIZE, CONF_RESPONSE_CACHE_TTL,
+                    CONF_ROUTING_MODELS, CONF_ROUTING_TTFT_BUDGET,
+                    CONF_SEMANTIC_CACHE, CONF_SEMANTIC_CACHE_THRESHOLD,
+                    CONF_SENTENCE_MIN_LENGTH, CONF_SUMMARIZE_HISTORY,
+                    CONF_TEMPERATURE, CONF_THINKING_MODE, CONF_TOP_P,
+                    CONF_WARMUP_INTERVAL, DEFAULT_CHAT_MODEL,
+                    DEFAULT_COMPLETION_TOKEN_PRICE, DEFAULT_CONNECT_TIMEOUT,
+                    DEFAULT_DAILY_TOKEN_BUDGET, DEFAULT_HTTP2,
+                    DEFAULT_INSTRUCTIONS_PROMPT_RU, DEFAULT_KEEPALIVE_EXPIRY,
+                    DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_IN_FLIGHT,
+                    DEFAULT_NO_HA_DEFAULT_PROMPT, DEFAULT_PARALLEL_TOOL_CALLS,
+                    DEFAULT_PROMPT_TOKEN_PRICE, DEFAULT_RATE_LIMIT,
+                    DEFAULT_READ_TIMEOUT, DEFAULT_RESPONSE_CACHE,
+                    DEFAULT_RESPONSE_CACHE_PERSIST,
+                    DEFAULT_RESPONSE_CACHE_SIZE, DEFAULT_RESPONSE_CACHE_TTL,
+                    DEFAULT_ROUTING_TTFT_BUDGET, DEFAULT_SEMANTIC_CACHE,
+                    DEFAULT_SEMANTIC_CACHE_THRESHOLD,
+                    DEFAULT_SENTENCE_MIN_LENGTH, DEFAULT_SUMMARIZE_HISTORY,
+                    DEFAULT_THINKING_MODE, DEFAULT_WARMUP_INTERVAL,
                     DOC_API_KEY_GUIDE_URL, DOC_PROJECT_ID_GUIDE_URL, DOMAIN,
-                    LOGGER, RECOMMENDED_CONVERSATION_OPTIONS,
-                    RECOMMENDED_MAX_TOKENS, RECOMMENDED_TEMPERATURE,
-                    RECOMMENDED_TOP_P)
+                    LOGGER, RECOMMENDED_CONTEXT_BUDGET,
+                    RECOMMENDED_CONVERSATION_OPTIONS, RECOMMENDED_MAX_TOKENS,
+                    RECOMMENDED_TEMPERATURE, RECOMMENDED_TOP_P, USAGE_CURRENCY)
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -117,6 +141,75 @@ class CloudRUAIConfigFlow(ConfigFlow, domain=DOMAIN):
             "ai_task_data": AITaskDataFlowHandler,
         }
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> CloudRUAIOptionsFlow:  # noqa: ARG004
+        """Create the options flow."""
+        return CloudRUAIOptionsFlow()
+
+
+class CloudRUAIOptionsFlow(OptionsFlow):
+    """Handle connection settings of the config entry."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the connection settings."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_MAX_CONNECTIONS,
+                        default=options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+                    ): NumberSelector(NumberSelectorConfig(min=1, max=100, step=1, mode=NumberSelectorMode.BOX)),
+                    vol.Optional(
+                        CONF_KEEPALIVE_EXPIRY,
+                        default=options.get(CONF_KEEPALIVE_EXPIRY, DEFAULT_KEEPALIVE_EXPIRY),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=0, max=3600, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_CONNECT_TIMEOUT,
+                        default=options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=1, max=120, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_READ_TIMEOUT,
+                        default=options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=1, max=600, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s"
+                        )
+                    ),
+                    vol.Optional(CONF_HTTP2, default=options.get(CONF_HTTP2, DEFAULT_HTTP2)): bool,
+                    vol.Optional(
+                        CONF_RATE_LIMIT,
+                        default=options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+                    ): NumberSelector(NumberSelectorConfig(min=0, max=6000, step=1, mode=NumberSelectorMode.BOX)),
+                    vol.Optional(
+                        CONF_MAX_IN_FLIGHT,
+                        default=options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT),
+                    ): NumberSelector(NumberSelectorConfig(min=0, max=100, step=1, mode=NumberSelectorMode.BOX)),
+                    vol.Optional(
+                        CONF_WARMUP_INTERVAL,
+                        default=options.get(CONF_WARMUP_INTERVAL, DEFAULT_WARMUP_INTERVAL),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=0, max=3600, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s"
+                        )
+                    ),
+                }
+            ),
+        )
+
 
 class ConversationFlowHandler(ConfigSubentryFlow):
     """Handle conversation subentry flow."""
@@ -169,27 +262,29 @@ class ConversationFlowHandler(ConfigSubentryFlow):
             self.options = dict(user_input)
 
         # Fetch models
-        client: openai.AsyncOpenAI = self._get_entry().runtime_data
+        catalog: ModelCatalog = self._get_entry().runtime_data.model_catalog
         model_options: list[SelectOptionDict] | None = None
+        routing_model_options: list[SelectOptionDict] = []
         try:
-            response = await client.models.list()
+            models = await catalog.async_get_models()
             model_options = []
-            for model in response.data:
-                if model.metadata.get("type") != "llm":  # type: ignore[attr-defined]
+            for model in models.values():
+                if not model.is_llm:
                     continue
 
-                is_billable = model.metadata.get("is_billable", True)  # type: ignore[attr-defined]
-                billable_emoji = "🆓" if not is_billable else "💰"
+                billable_emoji = "🆓" if not model.is_billable else "💰"
 
-                tools_emoji = " 🔧" if getattr(model, "function_calling", False) else ""
+                tools_emoji = " 🔧" if model.function_calling else ""
 
                 label = f"{model.id} {billable_emoji}{tools_emoji}"
 
                 model_options.append(SelectOptionDict(label=label, value=model.id))
+                if model.function_calling:
+                    routing_model_options.append(SelectOptionDict(label=label, value=model.id))
         except Exception:
             LOGGER.exception("Failed to fetch models, falling back to text input")
 
-        schema = cloud_ru_ai_config_option_schema(self.hass, self.options, model_options)
+        schema = cloud_ru_ai_config_option_schema(self.hass, self.options, model_options, routing_model_options)
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(schema),
@@ -244,20 +339,19 @@ class AITaskDataFlowHandler(ConfigSubentryFlow):
             )
 
         # Fetch models
-        client: openai.AsyncOpenAI = self._get_entry().runtime_data
+        catalog: ModelCatalog = self._get_entry().runtime_data.model_catalog
         model_options: list[SelectOptionDict] = []
         self.models = {}
         try:
-            response = await client.models.list()
-            for model in response.data:
-                if model.metadata.get("type") != "llm":  # type: ignore[attr-defined]
+            models = await catalog.async_get_models()
+            for model in models.values():
+                if not model.is_llm:
                     continue
 
-                if not getattr(model, "structure_output", False):
+                if not model.structure_output:
                     continue
 
-                is_billable = model.metadata.get("is_billable", True)  # type: ignore[attr-defined]
-                billable_emoji = "🆓" if not is_billable else "💰"
+                billable_emoji = "🆓" if not model.is_billable else "💰"
 
                 label = f"{model.id} {billable_emoji}"
 
@@ -279,6 +373,27 @@ class AITaskDataFlowHandler(ConfigSubentryFlow):
                             mode=SelectSelectorMode.DROPDOWN,
                         )
                     ),
+                    vol.Optional(
+                        CONF_RESPONSE_CACHE,
+                        default=self.options.get(CONF_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE),
+                    ): bool,
+                    vol.Optional(
+                        CONF_RESPONSE_CACHE_TTL,
+                        default=self.options.get(CONF_RESPONSE_CACHE_TTL, DEFAULT_RESPONSE_CACHE_TTL),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=1, max=604800, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_RESPONSE_CACHE_SIZE,
+                        default=self.options.get(CONF_RESPONSE_CACHE_SIZE, DEFAULT_RESPONSE_CACHE_SIZE),
+                    ): NumberSelector(NumberSelectorConfig(min=1, max=10000, step=1, mode=NumberSelectorMode.BOX)),
+                    vol.Optional(
+                        CONF_RESPONSE_CACHE_PERSIST,
+                        default=self.options.get(CONF_RESPONSE_CACHE_PERSIST, DEFAULT_RESPONSE_CACHE_PERSIST),
+                    ): bool,
+                    **usage_option_schema(self.options, model_options),
                 }
             ),
         )
@@ -288,6 +403,7 @@ def cloud_ru_ai_config_option_schema(
     hass: HomeAssistant,
     options: dict[str, Any] | MappingProxyType[str, Any],
     model_options: list[SelectOptionDict] | None = None,
+    routing_model_options: list[SelectOptionDict] | None = None,
 ) -> dict:
     """Return a schema for Cloud.ru Foundation Models completion options."""
 
@@ -353,7 +469,100 @@ def cloud_ru_ai_config_option_schema(
                 description={"suggested_value": options.get(CONF_NO_HA_DEFAULT_PROMPT, DEFAULT_NO_HA_DEFAULT_PROMPT)},
                 default=options.get(CONF_NO_HA_DEFAULT_PROMPT, DEFAULT_NO_HA_DEFAULT_PROMPT),
             ): bool,
+            vol.Optional(
+                CONF_CONTEXT_BUDGET,
+                description={"suggested_value": options.get(CONF_CONTEXT_BUDGET)},
+                default=RECOMMENDED_CONTEXT_BUDGET,
+            ): NumberSelector(NumberSelectorConfig(min=0, step=256, mode=NumberSelectorMode.BOX)),
+            vol.Optional(
+                CONF_SUMMARIZE_HISTORY,
+                description={"suggested_value": options.get(CONF_SUMMARIZE_HISTORY, DEFAULT_SUMMARIZE_HISTORY)},
+                default=options.get(CONF_SUMMARIZE_HISTORY, DEFAULT_SUMMARIZE_HISTORY),
+            ): bool,
+            vol.Optional(
+                CONF_PARALLEL_TOOL_CALLS,
+                description={"suggested_value": options.get(CONF_PARALLEL_TOOL_CALLS, DEFAULT_PARALLEL_TOOL_CALLS)},
+                default=options.get(CONF_PARALLEL_TOOL_CALLS, DEFAULT_PARALLEL_TOOL_CALLS),
+            ): bool,
+            vol.Optional(
+                CONF_SENTENCE_MIN_LENGTH,
+                description={"suggested_value": options.get(CONF_SENTENCE_MIN_LENGTH)},
+                default=DEFAULT_SENTENCE_MIN_LENGTH,
+            ): NumberSelector(NumberSelectorConfig(min=0, max=150, step=1, mode=NumberSelectorMode.BOX)),
+            vol.Optional(
+                CONF_SEMANTIC_CACHE,
+                description={"suggested_value": options.get(CONF_SEMANTIC_CACHE, DEFAULT_SEMANTIC_CACHE)},
+                default=options.get(CONF_SEMANTIC_CACHE, DEFAULT_SEMANTIC_CACHE),
+            ): bool,
+            vol.Optional(
+                CONF_SEMANTIC_CACHE_THRESHOLD,
+                description={"suggested_value": options.get(CONF_SEMANTIC_CACHE_THRESHOLD)},
+                default=DEFAULT_SEMANTIC_CACHE_THRESHOLD,
+            ): NumberSelector(NumberSelectorConfig(min=0.5, max=1, step=0.01)),
+            vol.Optional(
+                CONF_CASCADE_MODEL,
+                description={"suggested_value": options.get(CONF_CASCADE_MODEL)},
+            ): SelectSelector(
+                SelectSelectorConfig(
+                    options=routing_model_options or [],
+                    custom_value=True,
+                    mode=SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Optional(
+                CONF_ROUTING_MODELS,
+                description={"suggested_value": options.get(CONF_ROUTING_MODELS, [])},
+            ): SelectSelector(
+                SelectSelectorConfig(
+                    options=routing_model_options or [],
+                    multiple=True,
+                    custom_value=True,
+                    mode=SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Optional(
+                CONF_ROUTING_TTFT_BUDGET,
+                description={"suggested_value": options.get(CONF_ROUTING_TTFT_BUDGET)},
+                default=DEFAULT_ROUTING_TTFT_BUDGET,
+            ): NumberSelector(
+                NumberSelectorConfig(min=0, max=30, step=0.5, mode=NumberSelectorMode.BOX, unit_of_measurement="s")
+            ),
+            **usage_option_schema(options, model_options),
         }
     )
 
     return schema
+
+
+def usage_option_schema(
+    options: dict[str, Any] | MappingProxyType[str, Any],
+    model_options: list[SelectOptionDict] | None = None,
+) -> dict:
+    """Return a schema for token prices and the daily token budget."""
+    price_selector = NumberSelector(
+        NumberSelectorConfig(min=0, step="any", mode=NumberSelectorMode.BOX, unit_of_measurement=USAGE_CURRENCY)
+    )
+    fallback_model_selector = str if not model_options else SelectSelector(
+        SelectSelectorConfig(mode=SelectSelectorMode.DROPDOWN, options=model_options)
+    )
+    return {
+        vol.Optional(
+            CONF_PROMPT_TOKEN_PRICE,
+            description={"suggested_value": options.get(CONF_PROMPT_TOKEN_PRICE)},
+            default=DEFAULT_PROMPT_TOKEN_PRICE,
+        ): price_selector,
+        vol.Optional(
+            CONF_COMPLETION_TOKEN_PRICE,
+            description={"suggested_value": options.get(CONF_COMPLETION_TOKEN_PRICE)},
+            default=DEFAULT_COMPLETION_TOKEN_PRICE,
+        ): price_selector,
+        vol.Optional(
+            CONF_DAILY_TOKEN_BUDGET,
+            description={"suggested_value": options.get(CONF_DAILY_TOKEN_BUDGET)},
+            default=DEFAULT_DAILY_TOKEN_BUDGET,
+        ): NumberSelector(NumberSelectorConfig(min=0, step=1000, mode=NumberSelectorMode.BOX)),
+        vol.Optional(
+            CONF_BUDGET_FALLBACK_MODEL,
+            description={"suggested_value": options.get(CONF_BUDGET_FALLBACK_MODEL)},
+        ): fallback_model_selector,
+    }
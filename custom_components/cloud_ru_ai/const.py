@@ -30,6 +30,14 @@ DOC_PROJECT_ID_GUIDE_URL = "https://cloud.ru/docs/administration/ug/topics/guide
 DOC_API_KEY_GUIDE_URL = "https://cloud.ru/docs/foundation-models/ug/topics/api-ref__authentication"
 
 CONF_PROJECT_ID = "project_id"
+CONF_MAX_CONNECTIONS = "max_connections"
+CONF_KEEPALIVE_EXPIRY = "keepalive_expiry"
+CONF_HTTP2 = "http2"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_WARMUP_INTERVAL = "warmup_interval"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
 CONF_PROMPT = "prompt"
 CONF_RECOMMENDED = "recommended"
 CONF_MAX_TOKENS = "max_tokens"
@@ -38,10 +46,28 @@ CONF_TEMPERATURE = "temperature"
 CONF_TOP_P = "top_p"
 CONF_THINKING_MODE = "thinking_mode"
 CONF_NO_HA_DEFAULT_PROMPT = "no_ha_default_prompt"
+CONF_CONTEXT_BUDGET = "context_budget"
+CONF_SUMMARIZE_HISTORY = "summarize_history"
+CONF_PARALLEL_TOOL_CALLS = "parallel_tool_calls"
+CONF_SENTENCE_MIN_LENGTH = "sentence_min_length"
+CONF_SEMANTIC_CACHE = "semantic_cache"
+CONF_SEMANTIC_CACHE_THRESHOLD = "semantic_cache_threshold"
+CONF_RESPONSE_CACHE = "response_cache"
+CONF_RESPONSE_CACHE_TTL = "response_cache_ttl"
+CONF_RESPONSE_CACHE_SIZE = "response_cache_size"
+CONF_RESPONSE_CACHE_PERSIST = "response_cache_persist"
+CONF_PROMPT_TOKEN_PRICE = "prompt_token_price"
+CONF_COMPLETION_TOKEN_PRICE = "completion_token_price"
+CONF_DAILY_TOKEN_BUDGET = "daily_token_budget"
+CONF_BUDGET_FALLBACK_MODEL = "budget_fallback_model"
+CONF_ROUTING_MODELS = "routing_models"
+CONF_ROUTING_TTFT_BUDGET = "routing_ttft_budget"
+CONF_CASCADE_MODEL = "cascade_model"
 
 RECOMMENDED_MAX_TOKENS = 1024
 RECOMMENDED_TEMPERATURE = 0.5
 RECOMMENDED_TOP_P = 0.5
+RECOMMENDED_CONTEXT_BUDGET = 0  # unlimited
 
 DEFAULT_CHAT_MODEL = "Qwen/Qwen3-Coder-480B-A35B-Instruct"
 DEFAULT_INSTRUCTIONS_PROMPT_RU = """Ты — голосовой ассистент для Home Assistant.
@@ -49,6 +75,55 @@ DEFAULT_INSTRUCTIONS_PROMPT_RU = """Ты — голосовой ассистен
 """
 DEFAULT_THINKING_MODE = False
 DEFAULT_NO_HA_DEFAULT_PROMPT = False
+DEFAULT_SUMMARIZE_HISTORY = False
+DEFAULT_PARALLEL_TOOL_CALLS = False
+DEFAULT_SENTENCE_MIN_LENGTH = 20  # characters
+SENTENCE_MAX_LENGTH = 200  # characters
+DEFAULT_SEMANTIC_CACHE = False
+DEFAULT_SEMANTIC_CACHE_THRESHOLD = 0.9
+DEFAULT_RESPONSE_CACHE = False
+DEFAULT_RESPONSE_CACHE_TTL = 3600  # seconds
+DEFAULT_RESPONSE_CACHE_SIZE = 128
+DEFAULT_RESPONSE_CACHE_PERSIST = False
+DEFAULT_PROMPT_TOKEN_PRICE = 0.0  # RUB per million tokens
+DEFAULT_COMPLETION_TOKEN_PRICE = 0.0  # RUB per million tokens
+DEFAULT_DAILY_TOKEN_BUDGET = 0  # tokens, 0 is unlimited
+USAGE_CURRENCY = "RUB"
+DEFAULT_ROUTING_TTFT_BUDGET = 3.0  # seconds, 0 routes only on errors
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 120  # seconds
+DEFAULT_HTTP2 = False
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_READ_TIMEOUT = 60  # seconds, between streamed chunks
+DEFAULT_WARMUP_INTERVAL = 0  # seconds, disabled
+WARMUP_MIN_IDLE = 10  # seconds
+WARMUP_TIMEOUT = 10.0  # seconds
+DEFAULT_RATE_LIMIT = 0  # requests per minute, 0 is unlimited
+DEFAULT_MAX_IN_FLIGHT = 0  # 0 is unlimited
+
+TOOL_CACHE_MAX_SIZE = 256
+STRUCTURE_CACHE_MAX_SIZE = 64
+STRUCTURE_MAX_REPAIRS = 1  # requests for the fields that failed validation
+MESSAGE_STORE_MAX_CONVERSATIONS = 32
+MESSAGE_STORE_TTL = 600  # seconds
+SEMANTIC_CACHE_MAX_SIZE = 64
+# Model name of the turns answered by the semantic cache in latency statistics
+SEMANTIC_CACHE_MODEL = "semantic_cache"
+LATENCY_WINDOW = 100  # turns
+RESPONSE_CACHE_SAVE_DELAY = 60  # seconds
+USAGE_SAVE_DELAY = 60  # seconds
+ROUTING_WINDOW = 300  # seconds
+ROUTING_MAX_SAMPLES = 20  # requests per model
+ROUTING_MIN_SAMPLES = 3  # requests before a model may be skipped
+ROUTING_MAX_ERROR_RATE = 0.5
+CASCADE_MAX_ITERATIONS = 2  # requests of the small model per turn
+BATCH_MAX_ITEMS = 1000
+BATCH_DEFAULT_CONCURRENCY = 4
+BATCH_MAX_CONCURRENCY = 16
+MODEL_CATALOG_TTL = 3600  # seconds
+MODEL_CATALOG_TIMEOUT = 10.0  # seconds
+MODEL_CATALOG_MAX_RETRIES = 2
 
 RECOMMENDED_CONVERSATION_OPTIONS = {
     CONF_RECOMMENDED: True,
@@ -17,130 +17,170 @@
 
 from __future__ import annotations
 
-import json
-from collections.abc import AsyncGenerator
-from typing import Literal, TypedDict, cast
+from collections.abc import AsyncGenerator, AsyncIterable
+from functools import partial
+from typing import Any, Literal, cast
 
 import openai
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigSubentry
 from homeassistant.const import CONF_LLM_HASS_API, MATCH_ALL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError, TemplateError
 from homeassistant.helpers import intent, llm, template
 from homeassistant.helpers.entity_platform import \
     AddConfigEntryEntitiesCallback
-from openai._streaming import AsyncStream
+from homeassistant.helpers.json import json_dumps_sorted
 from openai._types import NOT_GIVEN
+from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletionChunk, ChatCompletionToolParam
 
-from . import CloudRUAIConfigEntry
-from .const import (CONF_CHAT_MODEL, CONF_MAX_TOKENS,
-                    CONF_NO_HA_DEFAULT_PROMPT, CONF_PROMPT, CONF_TEMPERATURE,
+from . import CloudRUAIConfigEntry, async_setup_subentry_entities
+from .cascade import CascadeTurn, async_watch_escalation
+from .const import (CONF_CASCADE_MODEL, CONF_CHAT_MODEL, CONF_CONTEXT_BUDGET,
+                    CONF_MAX_TOKENS, CONF_NO_HA_DEFAULT_PROMPT,
+                    CONF_PARALLEL_TOOL_CALLS, CONF_PROMPT, CONF_ROUTING_MODELS,
+                    CONF_ROUTING_TTFT_BUDGET, CONF_SEMANTIC_CACHE,
+                    CONF_SEMANTIC_CACHE_THRESHOLD, CONF_SENTENCE_MIN_LENGTH,
+                    CONF_SUMMARIZE_HISTORY, CONF_TEMPERATURE,
                     CONF_THINKING_MODE, CONF_TOP_P, DEFAULT_CHAT_MODEL,
                     DEFAULT_INSTRUCTIONS_PROMPT_RU,
-                    DEFAULT_NO_HA_DEFAULT_PROMPT, DEFAULT_THINKING_MODE,
-                    DOMAIN, LOGGER, RECOMMENDED_MAX_TOKENS,
-                    RECOMMENDED_TEMPERATURE, RECOMMENDED_TOP_P)
+                    DEFAULT_NO_HA_DEFAULT_PROMPT, DEFAULT_PARALLEL_TOOL_CALLS,
+                    DEFAULT_ROUTING_TTFT_BUDGET, DEFAULT_SEMANTIC_CACHE,
+                    DEFAULT_SEMANTIC_CACHE_THRESHOLD,
+                    DEFAULT_SENTENCE_MIN_LENGTH, DEFAULT_SUMMARIZE_HISTORY,
+                    DEFAULT_THINKING_MODE, DOMAIN, LOGGER,
+                    RECOMMENDED_CONTEXT_BUDGET, RECOMMENDED_MAX_TOKENS,
+                    RECOMMENDED_TEMPERATURE, RECOMMENDED_TOP_P,
+                    SEMANTIC_CACHE_MODEL, SENTENCE_MAX_LENGTH)
 from .entity import (CloudRUAIEntity, _convert_content_to_chat_message,
-                     _format_tool)
+                     _format_tool, _transform_stream)
+from .history import fit_messages_to_budget
+from .limiter import RequestLimiter, RequestPriority
+from .retry import async_stream_with_retry
+from .routing import Route, async_routed_stream
+from .semantic_cache import CachedPlan, QueryScope, SemanticCache
+from .sentences import SentenceChunker
+from .stats import CascadeStats, RetryStats
+from .timing import TurnTiming, async_timed_stream, timed_request
+from .usage import async_usage_stream
 
 # Max number of back and forth with the LLM to generate a response
 MAX_TOOL_ITERATIONS = 10
 
 
-class CurrentToolCall(TypedDict):
-    index: int
-    id: str
-    tool_name: str
-    tool_args: str
-
-
 async def async_setup_entry(
     _hass: HomeAssistant,
     config_entry: CloudRUAIConfigEntry,
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
     """Set up conversation entities from subentries."""
-    for subentry_id, subentry in config_entry.subentries.items():
-        if subentry.subentry_type != "conversation":
+    async_setup_subentry_entities(config_entry, "conversation", CloudRUAIConversationEntity, async_add_entities)
+
+
+async def _chunk_sentences(
+    stream: AsyncIterable[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict],
+    chunker: SentenceChunker,
+    timing: TurnTiming,
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+    """Group streamed content into sentences, so text-to-speech can start on whole sentences."""
+
+    def _content(text: str) -> conversation.AssistantContentDeltaDict:
+        timing.async_first_sentence()
+        return {"content": text}
+
+    async for delta in stream:
+        if "content" not in delta or not delta.keys() <= {"role", "content"}:
+            # Content ends before a tool call or a new message
+            if text := chunker.flush():
+                yield _content(text)
+            yield delta
             continue
-        async_add_entities([CloudRUAIConversationEntity(config_entry, subentry)], config_subentry_id=subentry_id)
 
-
-async def _transform_stream(
-    result: AsyncStream[ChatCompletionChunk],
+        delta = cast(conversation.AssistantContentDeltaDict, delta)
+        if "role" in delta:
+            if text := chunker.flush():
+                yield _content(text)
+            yield {"role": delta["role"]}
+        for text in chunker.feed(delta["content"] or ""):
+            yield _content(text)
+
+    if text := chunker.flush():
+        yield _content(text)
+
+
+def _model_stream(
+    client: openai.AsyncOpenAI,
+    model_args: dict[str, Any],
+    retry_stats: RetryStats,
+    timing: TurnTiming,
+    cascade: CascadeTurn | None,
+    model: str,
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Stream a response of a model, retrying transient failures."""
+    if cascade is not None:
+        model_args = cascade.model_args(model, model_args)
+    return async_stream_with_retry(
+        timed_request(partial(client.chat.completions.create, model=model, **model_args), timing, "request"),
+        retry_stats,
+    )
+
+
+async def _async_limited_stream(
+    limiter: RequestLimiter, stream: AsyncIterable[ChatCompletionChunk], timing: TurnTiming
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Hold a limiter slot while the response streams.
+
+    The slot is released when the stream ends, before Home Assistant waits
+    for the tool calls, so tools sending requests of their own do not wait
+    for the turn that called them.
+    """
+    async with limiter.async_slot(RequestPriority.INTERACTIVE):
+        timing.async_mark("queue")
+        async for chunk in stream:
+            yield chunk
+
+
+async def _replay_stream(
+    content: conversation.AssistantContentDeltaDict,
 ) -> AsyncGenerator[conversation.AssistantContentDeltaDict, None]:
-    """Transform a Cloud.ru Foundation Models delta stream into HA format."""
-    current_tool_call: CurrentToolCall | None = None
-
-    async for chunk in result:
-        LOGGER.debug("Received chunk: %s", chunk)
-
-        # Treat empty choices as a finish reason.
-        # Otherwise, `GetLiveContext` will fail with some models.
-        # `GetLiveContext` is the only basic tool that doesn't take any
-        # arguments — that might be the reason.
-        if not chunk.choices or chunk.choices[0].finish_reason:
-            if current_tool_call:
-                yield {
-                    "tool_calls": [
-                        llm.ToolInput(
-                            id=current_tool_call["id"],
-                            tool_name=current_tool_call["tool_name"],
-                            tool_args=json.loads(current_tool_call["tool_args"] or "{}"),
-                        )
-                    ]
-                }
-
-            break
-
-        delta = chunk.choices[0].delta
-
-        # Skip deltas with only whitespace (e.g., leading \n\n from some models)
-        if current_tool_call is None and not delta.tool_calls:
-            content = getattr(delta, "content", None)
-            if content and not content.strip():  # Ignore if content is only whitespace
-                continue
-            yield {  # type: ignore[misc]
-                key: value
-                for key in ("role", "content")
-                if (value := getattr(delta, key)) is not None
-            }
-            continue
-
-        # When doing tool calls, we should always have a tool call
-        # object or we have gotten stopped above with a finish_reason set.
-        if (
-            not delta.tool_calls
-            or not (delta_tool_call := delta.tool_calls[0])
-            or not delta_tool_call.function
-        ):
-            raise ValueError("Expected delta with tool call")
-
-        if current_tool_call and delta_tool_call.index == current_tool_call["index"]:
-            if current_tool_call is not None:
-                current_tool_call["tool_args"] += delta_tool_call.function.arguments or ""
-            continue
-
-        # We got tool call with new index, so we need to yield the previous
-        if current_tool_call:
-            yield {
-                "tool_calls": [
-                    llm.ToolInput(
-                        id=current_tool_call["id"],
-                        tool_name=current_tool_call["tool_name"],
-                        tool_args=json.loads(current_tool_call["tool_args"]),
-                    )
-                ]
-            }
-
-        current_tool_call = CurrentToolCall(
-            index=delta_tool_call.index,
-            id=cast(str, delta_tool_call.id),
-            tool_name=cast(str, delta_tool_call.function.name),
-            tool_args=delta_tool_call.function.arguments or "",
-        )
+    """Stream cached assistant content."""
+    yield content
+
+
+def _find_plan(
+    content: list[conversation.Content],
+) -> tuple[list[tuple[str, dict[str, Any]]], str, str] | None:
+    """Return the tool calls, serialized results and answer of a turn with a single tool round."""
+    if len(content) < 3:
+        return None
+    first, *tool_results, last = content
+    if (
+        not isinstance(first, conversation.AssistantContent)
+        or not first.tool_calls
+        or any(tool_call.external for tool_call in first.tool_calls)
+        or not isinstance(last, conversation.AssistantContent)
+        or last.tool_calls
+        or not last.content
+        or len(tool_results) != len(first.tool_calls)
+    ):
+        return None
+    results: list[conversation.ToolResultContent] = []
+    for result in tool_results:
+        # Failed tool calls are not worth repeating
+        if not isinstance(result, conversation.ToolResultContent) or "error" in result.tool_result:
+            return None
+        results.append(result)
+    return (
+        [(tool_call.tool_name, tool_call.tool_args) for tool_call in first.tool_calls],
+        _serialize_results(results),
+        last.content,
+    )
+
+
+def _serialize_results(tool_results: list[conversation.ToolResultContent]) -> str:
+    """Serialize tool results to compare them with cached ones."""
+    return json_dumps_sorted([[result.tool_name, result.tool_result] for result in tool_results])
 
 
 class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEntity):
@@ -153,6 +193,21 @@ class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEnti
         super().__init__(entry, subentry)
         if self.subentry.data.get(CONF_LLM_HASS_API):
             self._attr_supported_features = conversation.ConversationEntityFeature.CONTROL
+        self._semantic_cache: SemanticCache | None = None
+        if self.subentry.data.get(CONF_SEMANTIC_CACHE, DEFAULT_SEMANTIC_CACHE):
+            self._semantic_cache = SemanticCache(
+                float(self.subentry.data.get(CONF_SEMANTIC_CACHE_THRESHOLD, DEFAULT_SEMANTIC_CACHE_THRESHOLD))
+            )
+
+    async def async_added_to_hass(self) -> None:
+        """Register the semantic cache for invalidation."""
+        await super().async_added_to_hass()
+        if self._semantic_cache is not None:
+            self.entry.runtime_data.semantic_caches[self.subentry.subentry_id] = self._semantic_cache
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister the semantic cache."""
+        self.entry.runtime_data.semantic_caches.pop(self.subentry.subentry_id, None)
 
     @property
     def supported_languages(self) -> list[str] | Literal["*"]:
@@ -165,6 +220,7 @@ class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEnti
         chat_log: conversation.ChatLog,
     ) -> conversation.ConversationResult:
         """Call the API."""
+        timing = TurnTiming()
 
         options = self.subentry.data
         system_prompt = options.get(CONF_PROMPT, DEFAULT_INSTRUCTIONS_PROMPT_RU)
@@ -179,34 +235,77 @@ class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEnti
         except conversation.ConverseError as err:
             return err.as_conversation_result()
 
-        tools: list[ChatCompletionToolParam] | None = None
-        if chat_log.llm_api:
-            tools = [_format_tool(tool, chat_log.llm_api.custom_serializer) for tool in chat_log.llm_api.tools]
-
         no_ha_default_prompt = options.get(CONF_NO_HA_DEFAULT_PROMPT, DEFAULT_NO_HA_DEFAULT_PROMPT)
         system_prompt_override = await self._async_expand_prompt_template(
             system_prompt, user_input) if no_ha_default_prompt else None
+        timing.async_mark("prompt")
 
-        model = options.get(CONF_CHAT_MODEL, DEFAULT_CHAT_MODEL)
-        messages = [_convert_content_to_chat_message(content, system_prompt_override) for content in chat_log.content]
+        tools: list[ChatCompletionToolParam] | None = None
+        if chat_log.llm_api:
+            tools = self.entry.runtime_data.tool_cache.async_format_tools(chat_log.llm_api, _format_tool)
+        timing.async_mark("tool_specs")
+
+        # Only queries that start a conversation are answered the same way every time
+        semantic_cache = self._semantic_cache if chat_log.llm_api and len(chat_log.content) == 2 else None
+        scope: QueryScope = (user_input.language, user_input.device_id, user_input.satellite_id)
+        if semantic_cache is not None and (plan := semantic_cache.async_lookup(user_input.text, scope)) is not None:
+            replayed = await self._async_replay_plan(chat_log, user_input.agent_id, plan)
+            timing.async_mark("replay")
+            if replayed:
+                semantic_cache.async_record_full_replay()
+                self.entry.runtime_data.latency.async_record(
+                    self.subentry.subentry_id, self.entity_id, SEMANTIC_CACHE_MODEL, chat_log.conversation_id, timing
+                )
+                return self._async_build_result(user_input, chat_log)
 
-        client: openai.AsyncOpenAI = self.entry.runtime_data
+        model = options.get(CONF_CHAT_MODEL, DEFAULT_CHAT_MODEL)
+        router = self.entry.runtime_data.router
+        if (budget_model := self._async_budget_model(model)) == model and options.get(CONF_ROUTING_MODELS):
+            route = router.async_route(
+                self.subentry.subentry_id,
+                self.entity_id,
+                list(dict.fromkeys([model, *options[CONF_ROUTING_MODELS]])),
+                float(options.get(CONF_ROUTING_TTFT_BUDGET, DEFAULT_ROUTING_TTFT_BUDGET)),
+            )
+        else:
+            route = Route([budget_model], budget_model)
+        # Turns start on the small model of a cascade and may escalate to the routed models
+        cascade: CascadeTurn | None = None
+        if budget_model == model and (cascade_model := options.get(CONF_CASCADE_MODEL)) and cascade_model != model:
+            cascade = CascadeTurn(cascade_model, route)
+            route = cascade.route
+        small_tier_time: float | None = None
+        context_budget = int(options.get(CONF_CONTEXT_BUDGET, RECOMMENDED_CONTEXT_BUDGET))
+        summarize_history = options.get(CONF_SUMMARIZE_HISTORY, DEFAULT_SUMMARIZE_HISTORY)
+        message_store = self.entry.runtime_data.message_store
+        messages = message_store.async_get_messages(chat_log, _convert_content_to_chat_message, system_prompt_override)
+        timing.async_mark("messages")
+
+        client: openai.AsyncOpenAI = self.entry.runtime_data.client
+
+        def _record_usage(usage: CompletionUsage) -> None:
+            self._async_record_usage(route.model, usage)
+
+        tool_rounds = tool_calls = 0
+        chunker = SentenceChunker(
+            int(options.get(CONF_SENTENCE_MIN_LENGTH, DEFAULT_SENTENCE_MIN_LENGTH)), SENTENCE_MAX_LENGTH
+        )
 
         # To prevent infinite loops, we limit the number of iterations
         for _iteration in range(MAX_TOOL_ITERATIONS):
+            timing.async_start_iteration()
             model_args = {
-                "model": model,
-                "messages": messages,
+                "messages": fit_messages_to_budget(messages, context_budget, summarize_history),
                 "tools": tools or NOT_GIVEN,
                 "tool_choice": "auto" if tools else "none",
-                "parallel_tool_calls": False,
+                "parallel_tool_calls": options.get(CONF_PARALLEL_TOOL_CALLS, DEFAULT_PARALLEL_TOOL_CALLS),
                 "max_completion_tokens": options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
                 "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
                 "temperature": options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
                 "user": chat_log.conversation_id,
                 "stream": True,
                 "stream_options": {
-                    "include_usage": False,
+                    "include_usage": True,
                     "continuous_usage_stats": False,
                 },
             }
@@ -216,8 +315,28 @@ class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEnti
                     "chat_template_kwargs": {"enable_thinking": False}  # vLLM option
                 }
 
+            timing.async_mark("messages")
+
+            small_tier = cascade if cascade is not None and not cascade.escalated else None
+            stream = async_routed_stream(
+                router,
+                route,
+                partial(_model_stream, client, model_args, self.entry.runtime_data.retry_stats, timing, small_tier),
+            )
+            stream = _async_limited_stream(self.entry.runtime_data.limiter, stream, timing)
+            deltas = _transform_stream(async_timed_stream(async_usage_stream(stream, _record_usage), timing))
+            if small_tier is not None:
+                deltas = async_watch_escalation(deltas, small_tier)
             try:
-                result = await client.chat.completions.create(**model_args)
+                async for content in chat_log.async_add_delta_content_stream(
+                    user_input.agent_id,
+                    _chunk_sentences(deltas, chunker, timing),
+                ):
+                    if recorded := self._async_record_tool_calls(content):
+                        tool_rounds += 1
+                        tool_calls += recorded
+                # Tool calls still running when the stream ended
+                timing.async_mark("tool_calls")
             except openai.RateLimitError as err:
                 LOGGER.exception("Rate limited by Cloud.ru Foundation Models API: %s", err)
                 raise HomeAssistantError(translation_domain=DOMAIN, translation_key="rate_limited") from err
@@ -229,30 +348,82 @@ class CloudRUAIConversationEntity(CloudRUAIEntity, conversation.ConversationEnti
                     translation_placeholders={"details": str(err)},
                 ) from err
 
-            try:
-                messages.extend(
-                    [
-                        _convert_content_to_chat_message(content)
-                        async for content in chat_log.async_add_delta_content_stream(
-                            user_input.agent_id, _transform_stream(cast(AsyncStream[ChatCompletionChunk], result))
-                        )
-                    ]
-                )
-            except openai.OpenAIError as err:
-                LOGGER.exception("Error talking to Cloud.ru Foundation Models API: %s", err)
-                raise HomeAssistantError(
-                    translation_domain=DOMAIN,
-                    translation_key="api_error",
-                    translation_placeholders={"details": str(err)},
-                ) from err
+            answer_again = False
+            if cascade is not None and not cascade.escalated:
+                answer_again = cascade.async_end_iteration(route, chat_log.unresponded_tool_results)
+                if cascade.escalated:
+                    small_tier_time = timing.elapsed
+                    route = cascade.large
 
-            if not chat_log.unresponded_tool_results:
+            if not answer_again and not chat_log.unresponded_tool_results:
                 break
 
+            # Only the content added by this iteration gets converted
+            messages = message_store.async_get_messages(
+                chat_log, _convert_content_to_chat_message, system_prompt_override
+            )
+
+        if tool_calls:
+            LOGGER.debug(
+                "Made %d tool calls in %d round trips (%d saved)", tool_calls, tool_rounds, tool_calls - tool_rounds
+            )
+        self.entry.runtime_data.sentence_stats.async_record_turn(chunker.sentences, timing.first_sentence)
+        if timing.first_sentence is not None:
+            LOGGER.debug("Streamed %d sentences, the first after %.3fs", chunker.sentences, timing.first_sentence)
+
         if not isinstance(chat_log.content[-1], conversation.AssistantContent):
             LOGGER.error("API did not return a valid assistant response")
             raise HomeAssistantError(translation_domain=DOMAIN, translation_key="no_assistant_response")
 
+        if semantic_cache is not None and (found := _find_plan(chat_log.content[2:])) is not None:
+            semantic_cache.async_store(user_input.text, scope, *found)
+
+        if cascade is not None:
+            elapsed = timing.elapsed
+            if small_tier_time is None:
+                small_tier_time = elapsed
+            cascade_stats = self.entry.runtime_data.cascade_stats.setdefault(self.subentry.subentry_id, CascadeStats())
+            cascade_stats.async_record_turn(cascade.escalation, small_tier_time, elapsed - small_tier_time)
+        # Turns of a cascade are recorded for the tier that finished them
+        self.entry.runtime_data.latency.async_record(
+            self.subentry.subentry_id, self.entity_id, route.model, chat_log.conversation_id, timing
+        )
+
+        return self._async_build_result(user_input, chat_log)
+
+    async def _async_replay_plan(self, chat_log: conversation.ChatLog, agent_id: str, plan: CachedPlan) -> bool:
+        """Run the tool calls of a cached plan against the live state.
+
+        The cached answer is replayed as well if the tool results did not
+        change. Otherwise the model answers from the fresh results, which
+        still saves the round trip that picked the tools.
+        """
+        tool_calls = [
+            llm.ToolInput(tool_name=tool_name, tool_args=tool_args) for tool_name, tool_args in plan.tool_calls
+        ]
+        tool_results = [
+            content
+            async for content in chat_log.async_add_delta_content_stream(
+                agent_id, _replay_stream({"role": "assistant", "tool_calls": tool_calls})
+            )
+            if isinstance(content, conversation.ToolResultContent)
+        ]
+        if _serialize_results(tool_results) != plan.tool_results:
+            LOGGER.debug("Replayed %d cached tool calls, results changed", len(tool_calls))
+            return False
+
+        LOGGER.debug("Replayed %d cached tool calls and the cached answer", len(tool_calls))
+        async for _content in chat_log.async_add_delta_content_stream(
+            agent_id, _replay_stream({"role": "assistant", "content": plan.response})
+        ):
+            pass
+        return True
+
+    @callback
+    def _async_build_result(
+        self, user_input: conversation.ConversationInput, chat_log: conversation.ChatLog
+    ) -> conversation.ConversationResult:
+        """Return the result of the turn."""
         intent_response = intent.IntentResponse(language=user_input.language)
         intent_response.async_set_speech(chat_log.content[-1].content or "")
         return conversation.ConversationResult(
@@ -0,0 +1,66 @@
+"""Diagnostics support for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from . import CloudRUAIConfigEntry
+from .const import CONF_PROJECT_ID
+
+TO_REDACT = {CONF_API_KEY, CONF_PROJECT_ID}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,  # noqa: ARG001
+    entry: CloudRUAIConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = entry.runtime_data
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "subentries": {
+            subentry_id: {
+                "subentry_type": subentry.subentry_type,
+                "data": dict(subentry.data),
+            }
+            for subentry_id, subentry in entry.subentries.items()
+        },
+        "connections": runtime_data.connection_stats.as_dict(),
+        "limiter": runtime_data.limiter.as_dict(),
+        "request_coalescer": runtime_data.request_coalescer.as_dict(),
+        "model_catalog": runtime_data.model_catalog.as_dict(),
+        "tool_cache": runtime_data.tool_cache.as_dict(),
+        "structure_cache": runtime_data.structure_cache.as_dict(),
+        "message_store": runtime_data.message_store.as_dict(),
+        "semantic_caches": {
+            subentry_id: cache.as_dict() for subentry_id, cache in runtime_data.semantic_caches.items()
+        },
+        "response_caches": {
+            subentry_id: cache.as_dict() for subentry_id, cache in runtime_data.response_caches.items()
+        },
+        "tool_calls": runtime_data.tool_call_stats.as_dict(),
+        "retries": runtime_data.retry_stats.as_dict(),
+        "sentences": runtime_data.sentence_stats.as_dict(),
+        "latency": runtime_data.latency.as_dict(),
+        "routing": runtime_data.router.as_dict(),
+        "cascade": {subentry_id: stats.as_dict() for subentry_id, stats in runtime_data.cascade_stats.items()},
+        "usage": runtime_data.usage.as_dict(),
+    }
@@ -18,21 +18,26 @@
 from __future__ import annotations
 
 import json
-from collections.abc import AsyncGenerator, Callable
-from typing import TYPE_CHECKING, Any
+import logging
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any, TypedDict, cast
 
 import openai
 import voluptuous as vol
 from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigSubentry
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import llm
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.json import json_dumps
 from openai._types import NOT_GIVEN
+from openai.types import CompletionUsage
 from openai.types.chat import (ChatCompletionAssistantMessageParam,
-                               ChatCompletionMessage,
+                               ChatCompletionChunk, ChatCompletionMessage,
                                ChatCompletionMessageFunctionToolCallParam,
                                ChatCompletionMessageParam,
                                ChatCompletionSystemMessageParam,
@@ -47,15 +52,45 @@ from openai.types.shared_params.response_format_json_schema import JSONSchema
 from voluptuous_openapi import convert
 
 from . import CloudRUAIConfigEntry
-from .const import (CONF_CHAT_MODEL, CONF_MAX_TOKENS, CONF_TEMPERATURE,
+from .cache import CompiledStructure, ResponseCache
+from .coalescer import request_key
+from .const import (CONF_BUDGET_FALLBACK_MODEL, CONF_CHAT_MODEL,
+                    CONF_COMPLETION_TOKEN_PRICE, CONF_DAILY_TOKEN_BUDGET,
+                    CONF_MAX_TOKENS, CONF_PARALLEL_TOOL_CALLS,
+                    CONF_PROMPT_TOKEN_PRICE, CONF_TEMPERATURE,
                     CONF_THINKING_MODE, CONF_TOP_P, DEFAULT_CHAT_MODEL,
+                    DEFAULT_COMPLETION_TOKEN_PRICE, DEFAULT_DAILY_TOKEN_BUDGET,
+                    DEFAULT_PARALLEL_TOOL_CALLS, DEFAULT_PROMPT_TOKEN_PRICE,
                     DEFAULT_THINKING_MODE, DOMAIN, LOGGER,
                     RECOMMENDED_MAX_TOKENS, RECOMMENDED_TEMPERATURE,
                     RECOMMENDED_TOP_P)
+from .json_stream import IncrementalJSONParser
+from .limiter import RequestPriority
+from .retry import REQUEST_RETRY_POLICY, async_stream_with_retry
+from .timing import TurnTiming, async_timed_stream
+from .usage import async_usage_stream
 
 MAX_TOOL_ITERATIONS = 10
 
 
+@dataclass(slots=True)
+class ModelResponse:
+    """Last response to a chat log handled by an entity."""
+
+    # Parses the content of a structured response as it arrives
+    parser: IncrementalJSONParser | None = None
+    # Response cache entry of a final answer, stored once the caller accepts the answer
+    cache_entry: tuple[str, ChatCompletionMessage] | None = None
+
+
+class CurrentToolCall(TypedDict):
+    index: int
+    id: str
+    tool_name: str
+    tool_args: IncrementalJSONParser
+    emitted: bool
+
+
 def _adjust_schema(schema: dict[str, Any]) -> None:
     """Adjust the schema to be compatible with the API."""
 
@@ -78,20 +113,18 @@ def _adjust_schema(schema: dict[str, Any]) -> None:
             _adjust_schema(schema["items"])
 
 
-def _format_structured_output(
-    name: str, schema: vol.Schema, llm_api: llm.APIInstance | None
-) -> JSONSchema:
-    """Format the schema to be compatible with Cloud.ru API."""
-    result: JSONSchema = {"name": name, "strict": True}
-    result_schema = convert(
-        schema,
-        custom_serializer=llm_api.custom_serializer if llm_api else llm.selector_serializer,
-    )
-    _adjust_schema(result_schema)
-    result["schema"] = result_schema
+def _convert_structure(schema: vol.Schema, custom_serializer: Callable[[Any], Any] | None) -> dict[str, Any]:
+    """Convert a structured output schema to be compatible with Cloud.ru API."""
+    result = convert(schema, custom_serializer=custom_serializer)
+    _adjust_schema(result)
     return result
 
 
+def _format_structured_output(name: str, schema: dict[str, Any]) -> JSONSchema:
+    """Format the converted schema of a structured output."""
+    return {"name": name, "strict": True, "schema": schema}
+
+
 def _format_tool(
     tool: llm.Tool, custom_serializer: Callable[[Any], Any] | None
 ) -> ChatCompletionToolParam:
@@ -153,31 +186,168 @@ def _convert_content_to_chat_message(
     return None
 
 
+def _invalid_tool_call(
+    tool_call_id: str, tool_name: str, error: str
+) -> tuple[llm.ToolInput, conversation.ToolResultContentDeltaDict]:
+    """Return a tool call with malformed arguments and its error result.
+
+    The call is marked as external so Home Assistant does not run it, and the
+    error is sent back to the model to let it retry instead of failing the turn.
+    """
+    LOGGER.warning("Malformed arguments for tool %s: %s", tool_name, error)
+    tool_input = llm.ToolInput(id=tool_call_id, tool_name=tool_name, tool_args={}, external=True)
+    tool_result: conversation.ToolResultContentDeltaDict = {
+        "role": "tool_result",
+        "tool_call_id": tool_call_id,
+        "tool_name": tool_name,
+        "tool_result": {
+            "error": "InvalidToolArguments",
+            "error_text": f"Tool arguments must be a valid JSON object: {error}",
+        },
+    }
+    return tool_input, tool_result
+
+
+async def _transform_stream(
+    result: AsyncIterable[ChatCompletionChunk],
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+    """Transform a Cloud.ru Foundation Models delta stream into HA format.
+
+    Tool calls are accumulated by their index, so several (possibly
+    interleaved) parallel tool calls are supported. Each tool call is yielded
+    as soon as its arguments form a complete JSON object, and Home Assistant
+    starts executing it while the rest of the stream is still arriving.
+    Malformed arguments are reported back to the model as a tool error.
+    """
+    tool_calls: dict[int, CurrentToolCall] = {}
+    # Checked once, a stream has hundreds of chunks
+    debug = LOGGER.isEnabledFor(logging.DEBUG)
+
+    async for chunk in result:
+        if debug:
+            LOGGER.debug("Received chunk: %s", chunk.model_dump_json(exclude_unset=True))
+
+        # Treat empty choices as a finish reason.
+        # Otherwise, `GetLiveContext` will fail with some models.
+        # `GetLiveContext` is the only basic tool that doesn't take any
+        # arguments — that might be the reason.
+        if not (choices := chunk.choices):
+            break
+
+        choice = choices[0]
+        delta = choice.delta
+        content = delta.content
+
+        if delta.tool_calls:
+            completed: list[llm.ToolInput] = []
+            for delta_tool_call in delta.tool_calls:
+                if (current_tool_call := tool_calls.get(delta_tool_call.index)) is None:
+                    # The first delta of a tool call carries its id and name
+                    if not delta_tool_call.function:
+                        raise ValueError("Expected delta with tool call")
+
+                    current_tool_call = tool_calls[delta_tool_call.index] = CurrentToolCall(
+                        index=delta_tool_call.index,
+                        id=cast(str, delta_tool_call.id),
+                        tool_name=cast(str, delta_tool_call.function.name),
+                        tool_args=IncrementalJSONParser(expect_object=True),
+                        emitted=False,
+                    )
+
+                if (
+                    delta_tool_call.function
+                    and current_tool_call["tool_args"].feed(delta_tool_call.function.arguments or "")
+                    and not current_tool_call["emitted"]
+                ):
+                    current_tool_call["emitted"] = True
+                    completed.append(
+                        llm.ToolInput(
+                            id=current_tool_call["id"],
+                            tool_name=current_tool_call["tool_name"],
+                            tool_args=current_tool_call["tool_args"].result(),
+                        )
+                    )
+
+            if completed:
+                yield {"tool_calls": completed}
+
+        # Skip deltas with only whitespace (e.g., leading \n\n from some models)
+        elif not content or not content.isspace():
+            if (role := delta.role) is not None:
+                yield {"role": role} if content is None else {"role": role, "content": content}  # type: ignore[misc]
+            elif content is not None:
+                yield {"content": content}
+
+        if choice.finish_reason:
+            break
+
+    remaining: list[llm.ToolInput] = []
+    errors: list[conversation.ToolResultContentDeltaDict] = []
+    for _index, tool_call in sorted(tool_calls.items()):
+        if tool_call["emitted"]:
+            continue
+        tool_args = tool_call["tool_args"]
+        if not tool_args.started and tool_args.error is None:
+            # Tools without arguments may not stream any
+            remaining.append(llm.ToolInput(id=tool_call["id"], tool_name=tool_call["tool_name"], tool_args={}))
+            continue
+        tool_input, error = _invalid_tool_call(
+            tool_call["id"], tool_call["tool_name"], tool_args.error or f"Incomplete JSON: {tool_args.text!r}"
+        )
+        remaining.append(tool_input)
+        errors.append(error)
+
+    if remaining:
+        yield {"tool_calls": remaining}
+    for error in errors:
+        yield error
+
+
 async def _transform_response(
     message: ChatCompletionMessage,
-) -> AsyncGenerator[conversation.AssistantContentDeltaDict, None]:
-    """Transform non-stream response (used by AI Task)."""
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+    """Transform a complete response (replayed from the AI Task response cache)."""
     data: conversation.AssistantContentDeltaDict = {
         "role": message.role,
         "content": message.content,
     }
+    errors: list[conversation.ToolResultContentDeltaDict] = []
     if message.tool_calls:
-        data["tool_calls"] = [
-            llm.ToolInput(
-                id=tool_call.id,
-                tool_name=tool_call.function.name,
-                tool_args=json.loads(tool_call.function.arguments),
-            )
-            for tool_call in message.tool_calls
-            if tool_call.type == "function"
-        ]
+        data["tool_calls"] = []
+        for tool_call in message.tool_calls:
+            if tool_call.type != "function":
+                continue
+            try:
+                tool_args = json.loads(tool_call.function.arguments or "{}")
+                if not isinstance(tool_args, dict):
+                    raise ValueError(f"Expected an object, got {type(tool_args).__name__}")
+            except ValueError as err:
+                tool_input, error = _invalid_tool_call(tool_call.id, tool_call.function.name, str(err))
+                errors.append(error)
+            else:
+                tool_input = llm.ToolInput(id=tool_call.id, tool_name=tool_call.function.name, tool_args=tool_args)
+            data["tool_calls"].append(tool_input)
     yield data
+    for error in errors:
+        yield error
+
+
+async def _async_parse_content(
+    stream: AsyncIterable[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict],
+    parser: IncrementalJSONParser,
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+    """Pass on the deltas of a structured response, parsing its content as it arrives."""
+    async for delta in stream:
+        if content := delta.get("content"):
+            parser.feed(content)
+        yield delta
 
 
 class CloudRUAIEntity(Entity):
     """Shared base entity."""
 
     _attr_has_entity_name = True
+    _response_cache: ResponseCache | None = None
 
     def __init__(self, entry: CloudRUAIConfigEntry, subentry: ConfigSubentry) -> None:
         """Initialize shared entity."""
@@ -193,33 +363,146 @@ class CloudRUAIEntity(Entity):
             entry_type=dr.DeviceEntryType.SERVICE,
         )
 
+    @callback
+    def _async_record_tool_calls(self, content: conversation.Content) -> int:
+        """Record the tool calls requested by the model and return their number."""
+        if not isinstance(content, conversation.AssistantContent) or not content.tool_calls:
+            return 0
+        self.entry.runtime_data.tool_call_stats.async_record_round(len(content.tool_calls))
+        return len(content.tool_calls)
+
+    @callback
+    def _async_record_usage(self, model: str, usage: CompletionUsage) -> None:
+        """Record the token usage and the estimated cost of a request.
+
+        The prices are set for the model of the agent. The usage of other paid
+        models, like the budget fallback or a routed model, is left unpriced.
+        """
+        options = self.subentry.data
+        cost: float | None
+        # Models missing from the catalogue are assumed to be billable
+        if (info := self.entry.runtime_data.model_catalog.async_get_model(model)) is not None and not info.is_billable:
+            cost = 0.0
+        elif model != options.get(CONF_CHAT_MODEL, DEFAULT_CHAT_MODEL):
+            cost = None
+        else:
+            cost = (
+                usage.prompt_tokens * options.get(CONF_PROMPT_TOKEN_PRICE, DEFAULT_PROMPT_TOKEN_PRICE)
+                + usage.completion_tokens * options.get(CONF_COMPLETION_TOKEN_PRICE, DEFAULT_COMPLETION_TOKEN_PRICE)
+            ) / 1_000_000
+        self.entry.runtime_data.usage.async_record(self.subentry.subentry_id, model, usage, cost)
+
+    @callback
+    def _async_budget_model(self, model: str) -> str:
+        """Return the model to use within the daily token budget."""
+        options = self.subentry.data
+        budget = options.get(CONF_DAILY_TOKEN_BUDGET, DEFAULT_DAILY_TOKEN_BUDGET)
+        if not budget or self.entry.runtime_data.usage.usage(self.subentry.subentry_id).total_tokens < budget:
+            return model
+        if fallback_model := options.get(CONF_BUDGET_FALLBACK_MODEL):
+            LOGGER.debug("Daily token budget of %s exceeded, using %s", self.entity_id, fallback_model)
+            return fallback_model
+        raise HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="budget_exceeded",
+            translation_placeholders={"budget": str(int(budget))},
+        )
+
+    async def _async_create_stream(self, model_args: dict[str, Any]) -> AsyncGenerator[ChatCompletionChunk, None]:
+        """Stream a chat completion, retrying transient failures."""
+        runtime_data = self.entry.runtime_data
+        async with runtime_data.limiter.async_slot(RequestPriority.BACKGROUND):
+            stream = async_stream_with_retry(
+                partial(runtime_data.client.chat.completions.create, **model_args),
+                runtime_data.retry_stats,
+                REQUEST_RETRY_POLICY,
+            )
+            async for chunk in async_usage_stream(stream, partial(self._async_record_usage, model_args["model"])):
+                yield chunk
+
+    async def _async_stream_response(
+        self, model_args: dict[str, Any], timing: TurnTiming, response: ModelResponse
+    ) -> AsyncGenerator[conversation.AssistantContentDeltaDict | conversation.ToolResultContentDeltaDict, None]:
+        """Stream the model response, from the response cache if possible.
+
+        A final answer is not cached right away, it is set as the cache entry
+        of the response for the caller to store once it accepts the answer.
+        """
+        cache = self._response_cache
+        key = request_key(model_args)
+        if cache is not None and (message := cache.async_get(key)) is not None:
+            LOGGER.debug("Using a cached response")
+            timing.async_first_token()
+            async for delta in _transform_response(message):
+                yield delta
+            return
+
+        # Identical tasks issued at the same time share one stream
+        chunks = self.entry.runtime_data.request_coalescer.async_stream(
+            key, partial(self._async_create_stream, model_args)
+        )
+        content: list[str] = []
+        tool_calls = False
+        try:
+            async for delta in _transform_stream(async_timed_stream(chunks, timing)):
+                if "tool_calls" in delta:
+                    tool_calls = True
+                elif text := delta.get("content"):
+                    content.append(text)
+                yield delta
+        except openai.OpenAIError as err:
+            LOGGER.exception("Error talking to Cloud.ru API")
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="api_error",
+                translation_placeholders={"details": str(err)},
+            ) from err
+
+        # Tool calls depend on the current state of the home, only final answers are cached
+        if cache is not None and not tool_calls:
+            response.cache_entry = (key, ChatCompletionMessage(role="assistant", content="".join(content)))
+
+    @callback
+    def _async_cache_response(self, response: ModelResponse) -> None:
+        """Store the final answer of an accepted response in the response cache."""
+        if self._response_cache is not None and response.cache_entry is not None:
+            self._response_cache.async_put(*response.cache_entry)
+
     async def _async_handle_chat_log(
         self,
         chat_log: conversation.ChatLog,
         structure_name: str | None = None,
-        structure: vol.Schema | None = None,
-    ) -> None:
-        """Non-streaming chat completion (used by AI Task + structured output)."""
+        structure: CompiledStructure | None = None,
+    ) -> ModelResponse:
+        """Stream a chat completion (used by AI Task + structured output).
+
+        The content of a structured response is parsed as it arrives. The
+        last response is returned with its parser and response cache entry.
+        """
+        timing = TurnTiming()
         options = self.subentry.data
-        model = options.get(CONF_CHAT_MODEL, DEFAULT_CHAT_MODEL)
+        model = self._async_budget_model(options.get(CONF_CHAT_MODEL, DEFAULT_CHAT_MODEL))
 
         tools = None
         if chat_log.llm_api:
-            tools = [
-                _format_tool(tool, chat_log.llm_api.custom_serializer)
-                for tool in chat_log.llm_api.tools
-            ]
+            tools = self.entry.runtime_data.tool_cache.async_format_tools(chat_log.llm_api, _format_tool)
+        timing.async_mark("tool_specs")
 
         model_args: dict[str, Any] = {
             "model": model,
             "messages": [m for content in chat_log.content if (m := _convert_content_to_chat_message(content))],
             "tools": tools or NOT_GIVEN,
             "tool_choice": "auto" if tools else "none",
-            "parallel_tool_calls": False,
+            "parallel_tool_calls": options.get(CONF_PARALLEL_TOOL_CALLS, DEFAULT_PARALLEL_TOOL_CALLS),
             "max_completion_tokens": options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
             "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
             "temperature": options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
             "user": chat_log.conversation_id,
+            "stream": True,
+            "stream_options": {
+                "include_usage": True,
+                "continuous_usage_stats": False,
+            },
         }
 
         if structure:
@@ -227,40 +510,35 @@ class CloudRUAIEntity(Entity):
                 assert structure_name is not None
             model_args["response_format"] = ResponseFormatJSONSchema(
                 type="json_schema",
-                json_schema=_format_structured_output(structure_name, structure, chat_log.llm_api),
+                json_schema=_format_structured_output(structure_name, structure.schema),
             )
 
         # Cloud.ru thinking mode (default off for AI Task)
         if not options.get(CONF_THINKING_MODE, DEFAULT_THINKING_MODE):
             model_args["extra_body"] = {"chat_template_kwargs": {"enable_thinking": False}}
 
-        client = self.entry.runtime_data
+        timing.async_mark("messages")
 
+        response = ModelResponse()
         for _iteration in range(MAX_TOOL_ITERATIONS):
-            try:
-                result = await client.chat.completions.create(**model_args)
-            except openai.OpenAIError as err:
-                LOGGER.exception("Error talking to Cloud.ru API")
-                raise HomeAssistantError(
-                    translation_domain=DOMAIN,
-                    translation_key="api_error",
-                    translation_placeholders={"details": str(err)},
-                ) from err
-
-            if not result.choices:
-                raise HomeAssistantError("API returned empty response")
-
-            result_message = result.choices[0].message
-
-            model_args["messages"].extend(
-                [
-                    msg
-                    async for content in chat_log.async_add_delta_content_stream(
-                        self.entity_id, _transform_response(result_message)
-                    )
-                    if (msg := _convert_content_to_chat_message(content))
-                ]
-            )
+            timing.async_start_iteration()
+            response.cache_entry = None
+            deltas = self._async_stream_response(model_args, timing, response)
+            if structure:
+                response.parser = IncrementalJSONParser(expect_object=True)
+                deltas = _async_parse_content(deltas, response.parser)
+
+            # Partial responses are visible to chat log subscribers as they arrive
+            async for content in chat_log.async_add_delta_content_stream(self.entity_id, deltas):
+                self._async_record_tool_calls(content)
+                if msg := _convert_content_to_chat_message(content):
+                    model_args["messages"].append(msg)
+            timing.async_mark("tool_calls")
 
             if not chat_log.unresponded_tool_results:
                 break
+
+        self.entry.runtime_data.latency.async_record(
+            self.subentry.subentry_id, self.entity_id, model, chat_log.conversation_id, timing
+        )
+        return response
@@ -0,0 +1,151 @@
+"""Chat history windowing for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from typing import Any
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from .const import LOGGER
+
+# Rough average for the Cyrillic and Latin text the models see
+CHARS_PER_TOKEN = 3
+MESSAGE_OVERHEAD_TOKENS = 4
+
+COMPRESSED_TOOL_RESULT = '{"result": "omitted"}'
+SUMMARY_HEADER = "\n\nEarlier in this conversation:"
+SUMMARY_LINE_CHARS = 160
+SUMMARY_BUDGET_DIVISOR = 8
+
+
+def estimate_message_tokens(message: ChatCompletionMessageParam) -> int:
+    """Estimate the number of prompt tokens used by a message."""
+    chars = 0
+    content: Any = message.get("content")
+    if isinstance(content, str):
+        chars += len(content)
+    elif isinstance(content, list):
+        chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    for tool_call in message.get("tool_calls") or ():
+        function = tool_call.get("function", {})
+        chars += len(function.get("name", "")) + len(function.get("arguments", ""))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_tokens(messages: list[ChatCompletionMessageParam]) -> int:
+    """Estimate the number of prompt tokens used by a list of messages."""
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def _split_turns(
+    messages: list[ChatCompletionMessageParam],
+) -> tuple[ChatCompletionMessageParam | None, list[list[ChatCompletionMessageParam]]]:
+    """Split messages into the system message and turns starting with a user message."""
+    system = messages[0] if messages and messages[0]["role"] == "system" else None
+    turns: list[list[ChatCompletionMessageParam]] = []
+    for message in messages[1 if system else 0:]:
+        if message["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return system, turns
+
+
+def _summarize_turns(turns: list[list[ChatCompletionMessageParam]], max_chars: int) -> str:
+    """Return a compact note with the text of evicted turns.
+
+    The most recent lines are kept when the note does not fit into max_chars.
+    """
+    lines: list[str] = []
+    for turn in turns:
+        for message in turn:
+            content = message.get("content")
+            if message["role"] not in ("user", "assistant") or not isinstance(content, str) or not content:
+                continue
+            text = " ".join(content.split())
+            if len(text) > SUMMARY_LINE_CHARS:
+                text = text[: SUMMARY_LINE_CHARS - 1] + "…"
+            lines.append(f"\n- {message['role']}: {text}")
+
+    chars = len(SUMMARY_HEADER)
+    for index in range(len(lines) - 1, -1, -1):
+        chars += len(lines[index])
+        if chars > max_chars:
+            lines = lines[index + 1:]
+            break
+    return SUMMARY_HEADER + "".join(lines) if lines else ""
+
+
+def fit_messages_to_budget(
+    messages: list[ChatCompletionMessageParam],
+    budget: int,
+    summarize: bool = False,
+) -> list[ChatCompletionMessageParam]:
+    """Trim the chat history to fit the token budget.
+
+    The system message and the latest turn are always kept. Tool results of
+    older turns are compressed first, then the oldest turns are dropped. The
+    dropped turns can be summarized into a short note in the system message.
+    Messages are never mutated, trimmed ones are replaced with copies.
+    """
+    total = estimate_tokens(messages)
+    if budget <= 0 or total <= budget:
+        LOGGER.debug("Estimated prompt size: %d tokens in %d messages", total, len(messages))
+        return messages
+
+    system, turns = _split_turns(messages)
+    latest = turns.pop() if turns else []
+
+    turn_tokens = [estimate_tokens(turn) for turn in turns]
+    for index, turn in enumerate(turns):
+        if total <= budget:
+            break
+        if not any(message["role"] == "tool" for message in turn):
+            continue
+        turns[index] = [
+            {**message, "content": COMPRESSED_TOOL_RESULT}  # type: ignore[misc]
+            if message["role"] == "tool" else message
+            for message in turn
+        ]
+        compressed_tokens = estimate_tokens(turns[index])
+        total -= turn_tokens[index] - compressed_tokens
+        turn_tokens[index] = compressed_tokens
+
+    # Leave room for the note about the dropped turns
+    target = budget - budget // SUMMARY_BUDGET_DIVISOR if summarize else budget
+    evicted: list[list[ChatCompletionMessageParam]] = []
+    while turns and total > target:
+        evicted.append(turns.pop(0))
+        total -= turn_tokens.pop(0)
+
+    if (
+        system is not None
+        and summarize
+        and evicted
+        and (note := _summarize_turns(evicted, (budget - total) * CHARS_PER_TOKEN))
+    ):
+        system = {**system, "content": f"{system.get('content') or ''}{note}"}  # type: ignore[assignment]
+        total += len(note) // CHARS_PER_TOKEN
+
+    result = [system] if system is not None else []
+    for turn in (*turns, latest):
+        result.extend(turn)
+
+    LOGGER.debug(
+        "Estimated prompt size: %d tokens in %d messages (budget %d, %d turns dropped)",
+        total, len(result), budget, len(evicted),
+    )
+    return result
@@ -0,0 +1,125 @@
+"""Incremental JSON parsing for streamed Cloud.ru Foundation Models output."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+_CLOSERS = {"{": "}", "[": "]"}
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Accumulate a JSON object or array that arrives in chunks.
+
+    The structure is validated as the chunks arrive, so the parser knows when
+    the value is complete and fails early on data that can never become
+    valid JSON. Scalars inside the structure are validated on completion.
+    """
+
+    def __init__(self, expect_object: bool = False) -> None:
+        """Initialize the parser."""
+        self._expect_object = expect_object
+        self._chunks: list[str] = []
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._value: Any = None
+        self.complete = False
+        self.error: str | None = None
+
+    @property
+    def started(self) -> bool:
+        """Return if any non-whitespace data was received."""
+        return self._started
+
+    @property
+    def text(self) -> str:
+        """Return the data received so far."""
+        return "".join(self._chunks)
+
+    def feed(self, data: str) -> bool:
+        """Feed a chunk of data and return if the value is complete."""
+        if self.error is not None or not data:
+            return self.complete
+
+        if self.complete:
+            if data.strip(_WHITESPACE):
+                self._fail(f"Unexpected data after the end of JSON: {data!r}")
+            return self.complete
+
+        self._chunks.append(data)
+        for position, char in enumerate(data):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char in _WHITESPACE:
+                continue
+
+            if not self._started:
+                if char != "{" and (self._expect_object or char != "["):
+                    self._fail(f"Expected JSON {'object' if self._expect_object else 'value'}, got {char!r}")
+                    return False
+                self._started = True
+
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(_CLOSERS[char])
+            elif char in "}]":
+                if not self._stack or self._stack.pop() != char:
+                    self._fail(f"Unexpected {char!r}")
+                    return False
+                if not self._stack:
+                    self._finish(data[position + 1:])
+                    return self.complete
+
+        return False
+
+    def result(self) -> Any:
+        """Return the parsed value of a complete document."""
+        if self.error is not None:
+            raise ValueError(self.error)
+        if not self.complete:
+            raise ValueError("Incomplete JSON")
+        return self._value
+
+    def _finish(self, rest: str) -> None:
+        """Parse the complete value."""
+        text = self.text
+        if rest:
+            text = text[: len(text) - len(rest)]
+        try:
+            self._value = json.loads(text)
+        except json.JSONDecodeError as err:
+            self._fail(str(err))
+            return
+        self.complete = True
+        if rest.strip(_WHITESPACE):
+            self._fail(f"Unexpected data after the end of JSON: {rest!r}")
+
+    def _fail(self, error: str) -> None:
+        """Mark the document as malformed."""
+        self.error = error
+        self.complete = False
@@ -0,0 +1,241 @@
+"""Client-side request limiting for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import (CONF_MAX_IN_FLIGHT, CONF_RATE_LIMIT, DEFAULT_MAX_IN_FLIGHT,
+                    DEFAULT_RATE_LIMIT, DOMAIN, LOGGER)
+
+DATA_LIMITERS: HassKey[dict[str, _ProjectLimiter]] = HassKey(f"{DOMAIN}_limiters")
+
+
+class RequestPriority(IntEnum):
+    """Priority of a request, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RequestLimiter:
+    """Token bucket and in-flight limit shared by all requests of a project.
+
+    Requests that cannot start right away wait in a queue ordered by
+    priority, so voice commands overtake queued AI tasks. Both limits are
+    off by default, requests then skip the queue.
+    """
+
+    def __init__(self, rate_limit: float, max_in_flight: int) -> None:
+        """Initialize the limiter."""
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._in_flight = 0
+        self._rate = 0.0
+        self._capacity = math.inf
+        self._tokens = math.inf
+        self._updated = time.monotonic()
+        self._max_in_flight: float = math.inf
+        self.async_set_limits(rate_limit, max_in_flight)
+        self.requests = 0
+        self.waits = {priority.name.lower(): 0 for priority in RequestPriority}
+        self.wait_time = {priority.name.lower(): 0.0 for priority in RequestPriority}
+        self.max_queue_depth = 0
+
+    @callback
+    def async_set_limits(self, rate_limit: float, max_in_flight: int) -> None:
+        """Update the limits, the rate limit is in requests per minute (0 is unlimited for both)."""
+        self._rate = rate_limit / 60
+        self._max_in_flight = max_in_flight if max_in_flight > 0 else math.inf
+        # Allow a burst of up to max_in_flight requests, or a second worth of them without that limit
+        burst = self._max_in_flight if self._max_in_flight != math.inf else max(1.0, self._rate)
+        self._capacity = float(burst) if self._rate else math.inf
+        if not self._rate:
+            self._tokens = math.inf
+        self._dispatch()
+
+    @property
+    def enabled(self) -> bool:
+        """Return if any limit is set."""
+        return bool(self._rate) or self._max_in_flight != math.inf
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of waiting requests."""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def async_slot(self, priority: RequestPriority) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of the context."""
+        if not self.enabled:
+            self.requests += 1
+            yield
+            return
+        await self._async_acquire(priority)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    async def _async_acquire(self, priority: RequestPriority) -> None:
+        """Wait until a request may start."""
+        self.requests += 1
+        self._refill()
+        if not self._waiters and self._can_start():
+            self._start()
+            return
+
+        start = time.monotonic()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, waiter)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            else:
+                # The slot was granted right before the cancellation
+                self._in_flight -= 1
+            self._dispatch()
+            raise
+
+        waited = time.monotonic() - start
+        name = priority.name.lower()
+        self.waits[name] += 1
+        self.wait_time[name] += waited
+        LOGGER.debug("Request (%s) waited %.2fs for a slot", name, waited)
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _can_start(self) -> bool:
+        """Return if a request may start now."""
+        return self._in_flight < self._max_in_flight and self._tokens >= 1
+
+    def _start(self) -> None:
+        """Take a slot and a token."""
+        self._in_flight += 1
+        self._tokens -= 1
+
+    @callback
+    def _dispatch(self) -> None:
+        """Start the queued requests that fit into the limits."""
+        self._refill()
+        while self._waiters and self._can_start():
+            _, _, future = heapq.heappop(self._waiters)
+            self._start()
+            future.set_result(None)
+
+        if self._waiters and self._timer is None and self._in_flight < self._max_in_flight:
+            # Only tokens are missing, wait until the next one is earned
+            self._timer = asyncio.get_running_loop().call_later(
+                (1 - self._tokens) / self._rate, self._async_timer_elapsed
+            )
+
+    @callback
+    def _async_timer_elapsed(self) -> None:
+        """Dispatch requests once a token is earned."""
+        self._timer = None
+        self._dispatch()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the limiter state and statistics."""
+        return {
+            "rate_limit": round(self._rate * 60, 1),
+            "max_in_flight": self._max_in_flight if self._max_in_flight != math.inf else 0,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "waits": self.waits,
+            "average_wait": {
+                name: round(self.wait_time[name] / count, 3) if count else None for name, count in self.waits.items()
+            },
+        }
+
+
+def _strictest(values: list[float]) -> float:
+    """Return the strictest of the limits, 0 is unlimited."""
+    return min((value for value in values if value > 0), default=0)
+
+
+@dataclass
+class _ProjectLimiter:
+    """Limiter of a project and the limits configured by each of its entries."""
+
+    limiter: RequestLimiter
+    limits: dict[str, tuple[float, int]] = field(default_factory=dict)
+
+    @callback
+    def async_apply_limits(self) -> None:
+        """Apply the strictest limits configured by the entries."""
+        rate_limits = [rate_limit for rate_limit, _ in self.limits.values()]
+        in_flight_limits = [max_in_flight for _, max_in_flight in self.limits.values()]
+        self.limiter.async_set_limits(_strictest(rate_limits), int(_strictest(in_flight_limits)))
+
+
+@callback
+def async_get_limiter(
+    hass: HomeAssistant, project_id: str, entry_id: str, options: Mapping[str, Any]
+) -> RequestLimiter:
+    """Return the limiter of a project, shared by all its config entries.
+
+    When the entries set different limits, the strictest ones apply.
+    """
+    rate_limit = float(options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT))
+    max_in_flight = int(options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT))
+    limiters = hass.data.setdefault(DATA_LIMITERS, {})
+    if (project := limiters.get(project_id)) is None:
+        project = limiters[project_id] = _ProjectLimiter(RequestLimiter(rate_limit, max_in_flight))
+    project.limits[entry_id] = (rate_limit, max_in_flight)
+    if len(set(project.limits.values())) > 1:
+        LOGGER.warning("Config entries of project %s set different request limits, the strictest apply", project_id)
+    project.async_apply_limits()
+    return project.limiter
+
+
+@callback
+def async_release_limiter(hass: HomeAssistant, project_id: str, entry_id: str) -> None:
+    """Release the limiter of a project, removing it with the last entry."""
+    limiters = hass.data.get(DATA_LIMITERS, {})
+    if (project := limiters.get(project_id)) is None:
+        return
+    project.limits.pop(entry_id, None)
+    if project.limits:
+        project.async_apply_limits()
+    else:
+        del limiters[project_id]
@@ -0,0 +1,177 @@
+"""Retry policy for Cloud.ru Foundation Models requests."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import time
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable
+from dataclasses import dataclass
+
+import httpx
+import openai
+from homeassistant.core import callback
+from openai.types.chat import ChatCompletionChunk
+
+from .const import LOGGER
+from .stats import RetryStats
+
+RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Retry limits of a request path."""
+
+    name: str
+    attempts: int
+    base_delay: float
+    max_delay: float
+    # Total time all retries of a request may wait
+    budget: float
+
+
+# A voice command is better answered with an error than after a long wait
+STREAM_RETRY_POLICY = RetryPolicy("stream", attempts=2, base_delay=0.5, max_delay=2.0, budget=4.0)
+# Background tasks can wait longer for their answer
+REQUEST_RETRY_POLICY = RetryPolicy("request", attempts=4, base_delay=1.0, max_delay=20.0, budget=60.0)
+
+
+def _is_retryable(err: Exception) -> bool:
+    """Return if a failed request may succeed when sent again."""
+    if isinstance(err, (openai.APIConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(err, openai.APIStatusError):
+        return err.status_code in RETRYABLE_STATUS_CODES or err.status_code >= 500
+    return False
+
+
+def _retry_after(err: Exception) -> float | None:
+    """Return the delay requested by the server in seconds."""
+    if not isinstance(err, openai.APIStatusError):
+        return None
+    headers = err.response.headers
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if (date := email.utils.parsedate_tz(value)) is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(date) - time.time())
+
+
+class _Retrier:
+    """Retry state of a single request."""
+
+    def __init__(self, policy: RetryPolicy, stats: RetryStats) -> None:
+        """Initialize the retry state."""
+        self._policy = policy
+        self._stats = stats
+        self._attempt = 0
+        self._waited = 0.0
+
+    async def async_wait(self, err: Exception) -> None:
+        """Wait before the next attempt, or raise the error if no retry is left."""
+        policy = self._policy
+        if not _is_retryable(err) or self._attempt >= policy.attempts:
+            if self._attempt:
+                self._stats.async_record_exhausted()
+            raise err
+
+        backoff = min(policy.max_delay, policy.base_delay * 2**self._attempt)
+        delay = random.uniform(backoff / 2, backoff)
+        if (retry_after := _retry_after(err)) is not None:
+            delay = retry_after
+        if self._waited + delay > policy.budget:
+            LOGGER.debug("Not retrying %s, %.1fs wait exceeds the budget", policy.name, delay)
+            self._stats.async_record_exhausted()
+            raise err
+
+        self._attempt += 1
+        self._waited += delay
+        self._stats.async_record_retry(policy.name, delay)
+        LOGGER.warning(
+            "Retrying %s in %.1fs (attempt %d of %d): %s",
+            policy.name, delay, self._attempt, policy.attempts, err,
+        )
+        await asyncio.sleep(delay)
+
+    @callback
+    def async_done(self) -> None:
+        """Record a successful attempt."""
+        if self._attempt:
+            self._stats.async_record_recovered()
+
+
+def _has_output(chunk: ChatCompletionChunk) -> bool:
+    """Return if a chunk carries anything beyond the role."""
+    if not chunk.choices:
+        return True
+    choice = chunk.choices[0]
+    return bool(choice.delta.content or choice.delta.tool_calls or choice.finish_reason)
+
+
+async def async_stream_with_retry(
+    request: Callable[[], Awaitable[AsyncIterable[ChatCompletionChunk]]],
+    stats: RetryStats,
+    policy: RetryPolicy = STREAM_RETRY_POLICY,
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Stream a response, retrying transient failures until the first token.
+
+    Leading chunks without output are held back, so a stream that fails
+    before producing a token is restarted without a trace. Once a token is
+    yielded, errors are raised without retrying.
+    """
+    retrier = _Retrier(policy, stats)
+    while True:
+        pending: list[ChatCompletionChunk] | None = []
+        try:
+            stream = await request()
+            async for chunk in stream:
+                if pending is not None:
+                    pending.append(chunk)
+                    if not _has_output(chunk):
+                        continue
+                    retrier.async_done()
+                    for held in pending:
+                        yield held
+                    pending = None
+                    continue
+                yield chunk
+        except (openai.OpenAIError, httpx.TransportError) as err:
+            try:
+                if pending is None:
+                    raise
+                await retrier.async_wait(err)
+            except httpx.TransportError as transport_err:
+                # Errors while reading a stream are not wrapped by the library
+                raise openai.APIConnectionError(request=transport_err.request) from transport_err
+            continue
+
+        if pending:
+            retrier.async_done()
+            for held in pending:
+                yield held
+        return
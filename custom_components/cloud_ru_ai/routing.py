@@ -0,0 +1,182 @@
+"""Latency-aware model routing for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import statistics
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import openai
+from homeassistant.core import callback
+from openai.types.chat import ChatCompletionChunk
+
+from .const import (LOGGER, ROUTING_MAX_ERROR_RATE, ROUTING_MAX_SAMPLES,
+                    ROUTING_MIN_SAMPLES, ROUTING_WINDOW)
+
+
+@dataclass(slots=True)
+class Route:
+    """Candidate models of a turn, in the order to try them."""
+
+    models: list[str]
+    # The candidate answering the current request
+    model: str
+
+
+@dataclass(slots=True)
+class ModelHealth:
+    """Recent time to first token and error rate of a model."""
+
+    ttft: float | None
+    error_rate: float
+    samples: int
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the health with the time in milliseconds."""
+        return {
+            "ttft_p50_ms": round(self.ttft * 1000) if self.ttft is not None else None,
+            "error_rate": round(self.error_rate, 2),
+            "samples": self.samples,
+        }
+
+
+class ModelRouter:
+    """Route requests away from slow or failing models.
+
+    Each request records the time to its first chunk or a failure. Samples
+    older than the window are forgotten, so a skipped model gets another
+    chance once its bad samples expire.
+    """
+
+    def __init__(self, window: float = ROUTING_WINDOW, max_samples: int = ROUTING_MAX_SAMPLES) -> None:
+        """Initialize the router."""
+        self._window = window
+        self._max_samples = max_samples
+        # Time of each request and its time to first chunk, None for failures
+        self._samples: dict[str, deque[tuple[float, float | None]]] = {}
+        self._routes: dict[str, str] = {}
+
+    @callback
+    def async_record(self, model: str, ttft: float | None) -> None:
+        """Record the time to first chunk of a request, or None if it failed."""
+        samples = self._samples.setdefault(model, deque(maxlen=self._max_samples))
+        samples.append((time.monotonic(), ttft))
+
+    def health(self, model: str) -> ModelHealth:
+        """Return the recent health of a model."""
+        samples = self._samples.get(model)
+        if not samples:
+            return ModelHealth(None, 0.0, 0)
+        expired = time.monotonic() - self._window
+        while samples and samples[0][0] < expired:
+            samples.popleft()
+        ttfts = [ttft for _time, ttft in samples if ttft is not None]
+        return ModelHealth(
+            statistics.median(ttfts) if ttfts else None,
+            (len(samples) - len(ttfts)) / len(samples) if samples else 0.0,
+            len(samples),
+        )
+
+    def _skip_reason(self, model: str, ttft_budget: float) -> str | None:
+        """Return why a model should not be tried first, if it should not."""
+        health = self.health(model)
+        if health.samples < ROUTING_MIN_SAMPLES:
+            return None
+        if health.error_rate > ROUTING_MAX_ERROR_RATE:
+            return f"{health.error_rate:.0%} of requests failed"
+        if ttft_budget and health.ttft is not None and health.ttft > ttft_budget:
+            return f"first token after {health.ttft:.1f}s, over the {ttft_budget:.1f}s budget"
+        return None
+
+    @callback
+    def async_route(
+        self, subentry_id: str, entity_id: str | None, models: list[str], ttft_budget: float
+    ) -> Route:
+        """Order the candidates of a turn, healthy ones first.
+
+        Unhealthy candidates stay at the end in their original order, so a
+        request is still sent when every candidate is unhealthy.
+        """
+        healthy: list[str] = []
+        skipped: dict[str, str] = {}
+        for model in models:
+            if (reason := self._skip_reason(model, ttft_budget)) is None:
+                healthy.append(model)
+            else:
+                skipped[model] = reason
+        ordered = healthy + list(skipped)
+
+        if self._routes.get(subentry_id, models[0]) != ordered[0]:
+            if ordered[0] == models[0]:
+                LOGGER.info("Routing %s back to %s", entity_id, ordered[0])
+            else:
+                LOGGER.info(
+                    "Routing %s to %s: %s",
+                    entity_id, ordered[0], "; ".join(f"{model} {reason}" for model, reason in skipped.items()),
+                )
+        elif skipped:
+            LOGGER.debug("Routing %s to %s, skipped: %s", entity_id, ordered[0], skipped)
+        self._routes[subentry_id] = ordered[0]
+        return Route(ordered, ordered[0])
+
+    @callback
+    def async_remove(self, subentry_id: str) -> None:
+        """Forget the route of a removed subentry."""
+        self._routes.pop(subentry_id, None)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the health of the models and the current routes."""
+        return {
+            "models": {model: self.health(model).as_dict() for model in self._samples},
+            "routes": dict(self._routes),
+        }
+
+
+async def async_routed_stream(
+    router: ModelRouter,
+    route: Route,
+    request: Callable[[str], AsyncIterable[ChatCompletionChunk]],
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Stream a response from the first candidate that answers.
+
+    A candidate failing before its first chunk is recorded and the next one
+    is tried. Once a chunk is yielded, errors are raised. Later requests of
+    the turn start with the candidate that answered.
+    """
+    models = route.models[route.models.index(route.model):]
+    for index, model in enumerate(models):
+        route.model = model
+        start = time.monotonic()
+        first = True
+        try:
+            async for chunk in request(model):
+                if first:
+                    first = False
+                    router.async_record(model, time.monotonic() - start)
+                yield chunk
+        except openai.OpenAIError as err:
+            if not first:
+                raise
+            router.async_record(model, None)
+            if index == len(models) - 1:
+                raise
+            LOGGER.warning("Request to %s failed, falling back to %s: %s", model, models[index + 1], err)
+            continue
+        return
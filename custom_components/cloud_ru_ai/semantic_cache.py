@@ -0,0 +1,236 @@
+"""Semantic cache of conversation tool plans."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import callback
+
+from .const import LOGGER, SEMANTIC_CACHE_MAX_SIZE
+
+# Words that do not change the meaning of a voice command
+FILLER_WORDS = frozenset(
+    {
+        "a", "an", "the", "please", "hey", "ok", "okay", "can", "could", "would", "you", "me", "tell",
+        "а", "ну", "ка", "пожалуйста", "скажи", "подскажи", "слушай", "мне",
+    }
+)
+
+# Beginnings of number words, which must match exactly as tool arguments depend on them.
+# Words that merely start like a number are matched exactly as well, only costing a cache miss.
+NUMBER_PREFIXES = (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve",
+    "thirt", "fift", "twent", "fort", "hundred", "thousand", "half", "quarter", "percent", "first", "third",
+    "ноль", "нол", "нул", "один", "одн", "перв", "два", "две", "двух", "двум",
+    "двен", "двад", "втор", "три", "трех", "трем", "трет", "четыр", "четв",
+    "сорок", "пят", "шест", "сем", "восем", "восьм", "девят", "десят",
+    "сто", "ста", "двест", "тысяч", "полов", "полтор", "процент",
+)
+
+# Tools that only read the state of the home, so a similar query can safely run them again
+READ_ONLY_TOOLS = frozenset(
+    {
+        "GetLiveContext", "GetDateTime", "HassGetState", "HassGetCurrentDate", "HassGetCurrentTime",
+        "HassGetWeather", "HassClimateGetTemperature", "todo_get_items", "calendar_get_events",
+    }
+)
+
+# Differing words must share a stem of this length, so only their endings differ
+_STEM_LENGTH = 3
+_MIN_WORD_LENGTH = 4
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+# Language, device and satellite the query was made from
+type QueryScope = tuple[str, str | None, str | None]
+
+
+def normalize_utterance(text: str) -> tuple[str, ...]:
+    """Return the meaningful words of an utterance in their spoken order.
+
+    The order is kept as it binds actions and values to their targets:
+    "turn on the light and off the fan" is not the same command as "turn off
+    the light and on the fan".
+    """
+    words = _NON_WORD_RE.sub(" ", text.casefold().replace("ё", "е")).split()
+    return tuple(word for word in words if word not in FILLER_WORDS)
+
+
+def _trigrams(words: tuple[str, ...]) -> Counter[str]:
+    """Return the character trigrams of the words."""
+    trigrams: Counter[str] = Counter()
+    for word in words:
+        padded = f" {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def _norm(trigrams: Counter[str]) -> float:
+    """Return the length of a trigram vector."""
+    return math.sqrt(sum(count * count for count in trigrams.values()))
+
+
+def _is_number(word: str) -> bool:
+    """Return if a word is or may be a number."""
+    return any(char.isdigit() for char in word) or word.startswith(NUMBER_PREFIXES)
+
+
+def _same_stem(word: str, other: str) -> bool:
+    """Return if two words only differ in their endings (inflection or a recognition error)."""
+    return (
+        min(len(word), len(other)) >= _MIN_WORD_LENGTH
+        and word[:_STEM_LENGTH] == other[:_STEM_LENGTH]
+        and not _is_number(word)
+        and not _is_number(other)
+    )
+
+
+def _words_compatible(words: tuple[str, ...], other: tuple[str, ...]) -> bool:
+    """Return if every differing word pairs with a word of the same stem.
+
+    Short words and numbers must match exactly, so "turn on" never matches
+    "turn off", "включи" never matches "выключи" and "seventeen" never
+    matches "seventy".
+    """
+    missing = list((Counter(words) - Counter(other)).elements())
+    extra = list((Counter(other) - Counter(words)).elements())
+    if len(missing) != len(extra):
+        return False
+    for word in missing:
+        if (match := next((candidate for candidate in extra if _same_stem(word, candidate)), None)) is None:
+            return False
+        extra.remove(match)
+    return True
+
+
+@dataclass(slots=True)
+class CachedPlan:
+    """Tool calls made for a query and the answer given for their results."""
+
+    words: tuple[str, ...]
+    trigrams: Counter[str]
+    norm: float
+    tool_calls: list[tuple[str, dict[str, Any]]]
+    # Serialized tool results the answer was based on
+    tool_results: str
+    response: str
+    # Only plans without side effects are replayed for queries that are merely similar
+    read_only: bool
+
+
+class SemanticCache:
+    """Tool plans of recent single-turn queries of a conversation agent.
+
+    Queries are matched by the cosine similarity of their character
+    trigrams, which ignore the word order. A matched plan is run again
+    against the live state, and the cached answer is only reused if the tool
+    results did not change. Plans with side effects are only run again for
+    the same normalized query, words in the same order.
+    """
+
+    def __init__(self, threshold: float, max_size: int = SEMANTIC_CACHE_MAX_SIZE) -> None:
+        """Initialize the cache."""
+        self._threshold = threshold
+        self._max_size = max_size
+        self._plans: OrderedDict[tuple[QueryScope, tuple[str, ...]], CachedPlan] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.full_replays = 0
+        self.invalidations = 0
+
+    @callback
+    def async_lookup(self, text: str, scope: QueryScope) -> CachedPlan | None:
+        """Return the plan of the most similar cached query."""
+        words = normalize_utterance(text)
+        if (plan := self._plans.get((scope, words))) is None:
+            plan = self._async_find_similar(words, scope)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._plans.move_to_end((scope, plan.words))
+        return plan
+
+    @callback
+    def async_store(
+        self,
+        text: str,
+        scope: QueryScope,
+        tool_calls: list[tuple[str, dict[str, Any]]],
+        tool_results: str,
+        response: str,
+    ) -> None:
+        """Cache the plan of a query."""
+        words = normalize_utterance(text)
+        if not words:
+            return
+        trigrams = _trigrams(words)
+        read_only = all(tool_name in READ_ONLY_TOOLS for tool_name, _tool_args in tool_calls)
+        self._plans[(scope, words)] = CachedPlan(
+            words, trigrams, _norm(trigrams), tool_calls, tool_results, response, read_only
+        )
+        self._plans.move_to_end((scope, words))
+        if len(self._plans) > self._max_size:
+            self._plans.popitem(last=False)
+
+    @callback
+    def async_record_full_replay(self) -> None:
+        """Record a query answered without the model."""
+        self.full_replays += 1
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Drop all cached plans."""
+        if not self._plans:
+            return
+        self._plans.clear()
+        self.invalidations += 1
+        LOGGER.debug("Semantic cache invalidated")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._plans),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "full_replays": self.full_replays,
+            "invalidations": self.invalidations,
+        }
+
+    def _async_find_similar(self, words: tuple[str, ...], scope: QueryScope) -> CachedPlan | None:
+        """Return the most similar plan above the threshold."""
+        if not words:
+            return None
+        trigrams = _trigrams(words)
+        norm = _norm(trigrams)
+        best: CachedPlan | None = None
+        best_score = self._threshold
+        for (plan_scope, _), plan in self._plans.items():
+            if plan_scope != scope or not plan.read_only:
+                continue
+            score = sum(count * plan.trigrams[trigram] for trigram, count in trigrams.items()) / (norm * plan.norm)
+            if score >= best_score and _words_compatible(words, plan.words):
+                best, best_score = plan, score
+        if best is not None:
+            LOGGER.debug("Matched %s to cached query %s (%.2f)", words, best.words, best_score)
+        return best
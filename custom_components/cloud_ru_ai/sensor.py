@@ -0,0 +1,198 @@
+"""Sensor platform for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from homeassistant.components.sensor import (SensorDeviceClass, SensorEntity,
+                                             SensorEntityDescription,
+                                             SensorStateClass)
+from homeassistant.config_entries import ConfigSubentry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import \
+    AddConfigEntryEntitiesCallback
+
+from . import CloudRUAIConfigEntry, async_setup_subentry_entities
+from .const import (CONF_DAILY_TOKEN_BUDGET, DEFAULT_DAILY_TOKEN_BUDGET,
+                    USAGE_CURRENCY)
+from .entity import CloudRUAIEntity
+from .timing import METRIC_FIRST_TOKEN, METRIC_TOTAL, SIGNAL_LATENCY_UPDATED
+from .usage import SIGNAL_USAGE_UPDATED, UsageCounters
+
+LATENCY_SENSORS = (
+    SensorEntityDescription(
+        key=METRIC_FIRST_TOKEN,
+        translation_key="first_token_latency",
+    ),
+    SensorEntityDescription(
+        key=METRIC_TOTAL,
+        translation_key="response_latency",
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class CloudRUAIUsageSensorEntityDescription(SensorEntityDescription):
+    """Describes a daily usage sensor."""
+
+    value_fn: Callable[[UsageCounters], float]
+
+
+USAGE_SENSORS = (
+    CloudRUAIUsageSensorEntityDescription(
+        key="tokens",
+        translation_key="tokens_today",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.TOTAL,
+        value_fn=lambda usage: usage.total_tokens,
+    ),
+    CloudRUAIUsageSensorEntityDescription(
+        key="requests",
+        translation_key="requests_today",
+        native_unit_of_measurement="requests",
+        state_class=SensorStateClass.TOTAL,
+        value_fn=lambda usage: usage.requests,
+    ),
+    CloudRUAIUsageSensorEntityDescription(
+        key="cost",
+        translation_key="cost_today",
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement=USAGE_CURRENCY,
+        state_class=SensorStateClass.TOTAL,
+        suggested_display_precision=2,
+        value_fn=lambda usage: round(usage.cost, 4),
+    ),
+)
+
+
+async def async_setup_entry(
+    _hass: HomeAssistant,
+    config_entry: CloudRUAIConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up latency and usage sensors."""
+    factories = [
+        *(partial(CloudRUAILatencySensor, description=description) for description in LATENCY_SENSORS),
+        *(partial(CloudRUAIUsageSensor, description=description) for description in USAGE_SENSORS),
+    ]
+    for subentry_type in ("conversation", "ai_task_data"):
+        for factory in factories:
+            async_setup_subentry_entities(config_entry, subentry_type, factory, async_add_entities)
+
+
+class CloudRUAISensor(CloudRUAIEntity, SensorEntity):
+    """Sensor of an agent updated by a dispatcher signal."""
+
+    _signal: str
+
+    def __init__(
+        self,
+        entry: CloudRUAIConfigEntry,
+        subentry: ConfigSubentry,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(entry, subentry)
+        self.entity_description = description
+        self._attr_unique_id = f"{subentry.subentry_id}_{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor when the signal of the subentry is sent."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._signal.format(self.subentry.subentry_id), self._async_write_state
+            )
+        )
+
+    @callback
+    def _async_write_state(self) -> None:
+        """Write the new state."""
+        self.async_write_ha_state()
+
+
+class CloudRUAILatencySensor(CloudRUAISensor):
+    """Median latency of the recent turns of an agent."""
+
+    _signal = SIGNAL_LATENCY_UPDATED
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def _percentiles(self) -> dict[str, float] | None:
+        """Return the percentiles of the metric."""
+        return self.entry.runtime_data.latency.percentiles(self.subentry.subentry_id, self.entity_description.key)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the median latency."""
+        if (percentiles := self._percentiles) is None:
+            return None
+        return percentiles["p50"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the tail latencies and the number of samples."""
+        if (percentiles := self._percentiles) is None:
+            return None
+        return {key: value for key, value in percentiles.items() if key != "p50"}
+
+
+class CloudRUAIUsageSensor(CloudRUAISensor):
+    """Token usage of an agent today."""
+
+    _signal = SIGNAL_USAGE_UPDATED
+    entity_description: CloudRUAIUsageSensorEntityDescription
+
+    @property
+    def _usage(self) -> UsageCounters:
+        """Return the usage of the agent today."""
+        return self.entry.runtime_data.usage.usage(self.subentry.subentry_id)
+
+    @property
+    def native_value(self) -> float:
+        """Return the usage today."""
+        return self.entity_description.value_fn(self._usage)
+
+    @property
+    def last_reset(self) -> datetime:
+        """Return the start of the day."""
+        return self.entry.runtime_data.usage.last_reset
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the token split and the budget left, or the tokens left out of the cost."""
+        usage = self._usage
+        if self.entity_description.key == "cost":
+            return {"unpriced_tokens": usage.unpriced_tokens}
+        if self.entity_description.key != "tokens":
+            return None
+        attributes: dict[str, Any] = {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        }
+        if budget := self.subentry.data.get(CONF_DAILY_TOKEN_BUDGET, DEFAULT_DAILY_TOKEN_BUDGET):
+            attributes["budget_left"] = max(0, int(budget) - usage.total_tokens)
+        return attributes
@@ -0,0 +1,106 @@
+"""Sentence chunking of streamed Cloud.ru Foundation Models output."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import re
+
+# End of a sentence: terminal punctuation (closing quotes and brackets
+# included) followed by whitespace, or a line break. Punctuation without
+# whitespace after it, as in "21.5" or "т.е", is not a boundary yet.
+_SENTENCE_END_RE = re.compile(r"[.!?…]+[\"'»”)\]]*\s+|\n\s*")
+# Phrase boundary used to split sentences that grow too long
+_PHRASE_END_RE = re.compile(r"[,;:]\s+|\s[—–-]\s+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_LAST_WORD_RE = re.compile(r"(\S+)$")
+# A dot between two letters, as in "т.е" or "e.g", but not in numbers like "21.5"
+_DOTTED_ABBREVIATION_RE = re.compile(r"[^\W\d_]\.[^\W\d_]")
+
+# Words followed by a period that rarely end a sentence
+ABBREVIATIONS = frozenset(
+    {
+        "mr", "mrs", "ms", "dr", "st", "vs", "jr", "sr",
+        "г", "гг", "ул", "д", "кв", "др", "пр", "см", "им",
+        "тыс", "млн", "млрд", "руб", "коп", "стр", "напр",
+    }
+)
+
+
+def _is_abbreviation(text: str) -> bool:
+    """Return if the text ends with an abbreviation like "Mr", "ул" or "т.е"."""
+    if (match := _LAST_WORD_RE.search(text)) is None:
+        return False
+    word = match.group(1).lstrip("\"'«“(").casefold()
+    return _DOTTED_ABBREVIATION_RE.search(word) is not None or word in ABBREVIATIONS
+
+
+class SentenceChunker:
+    """Group streamed text into sentences that text-to-speech can speak.
+
+    Sentences shorter than the minimum length are joined with the next one.
+    Sentences longer than the maximum length are split at a phrase
+    boundary, or at a word boundary if there is none. Joining the chunks
+    always gives back the original text.
+    """
+
+    def __init__(self, min_length: int, max_length: int) -> None:
+        """Initialize the chunker."""
+        self._min_length = min_length
+        self._max_length = max(max_length, min_length + 1)
+        self._buffer = ""
+        self.sentences = 0
+
+    def feed(self, text: str) -> list[str]:
+        """Feed streamed text and return the chunks completed by it."""
+        self._buffer += text
+        chunks: list[str] = []
+        while (end := self._find_boundary()) is not None:
+            chunks.append(self._buffer[:end])
+            self._buffer = self._buffer[end:]
+        self.sentences += len(chunks)
+        return chunks
+
+    def flush(self) -> str:
+        """Return the remaining text."""
+        text, self._buffer = self._buffer, ""
+        if text:
+            self.sentences += 1
+        return text
+
+    def _find_boundary(self) -> int | None:
+        """Return the end of the first complete chunk in the buffer."""
+        buffer = self._buffer
+        for match in _SENTENCE_END_RE.finditer(buffer):
+            if (
+                match.end() >= self._min_length
+                and buffer[:match.start()].strip()
+                and not (match.group()[:2].rstrip() == "." and _is_abbreviation(buffer[:match.start()]))
+            ):
+                return match.end()
+            if match.end() > self._max_length:
+                break
+
+        if len(buffer) <= self._max_length:
+            return None
+        # Split at the last phrase or word boundary that keeps the chunk short enough
+        for pattern in (_PHRASE_END_RE, _WHITESPACE_RE):
+            ends = [
+                match.end() for match in pattern.finditer(buffer, 0, self._max_length)
+                if match.end() >= self._min_length
+            ]
+            if ends:
+                return ends[-1]
+        return None
@@ -0,0 +1,161 @@
+"""Services of Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import ai_task
+from homeassistant.const import ATTR_ENTITY_ID, CONF_DESCRIPTION, CONF_SELECTOR
+from homeassistant.core import (HomeAssistant, ServiceCall, ServiceResponse,
+                                SupportsResponse, callback)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import selector
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util.ulid import ulid_now
+
+from .const import (BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY,
+                    BATCH_MAX_ITEMS, DOMAIN, LOGGER)
+
+SERVICE_GENERATE_DATA_BATCH = "generate_data_batch"
+EVENT_BATCH_ITEM = f"{DOMAIN}_batch_item"
+
+ATTR_TASK_NAME = "task_name"
+ATTR_INSTRUCTIONS = "instructions"
+ATTR_INPUTS = "inputs"
+ATTR_STRUCTURE = "structure"
+ATTR_REQUIRED = "required"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_BATCH_ID = "batch_id"
+
+STRUCTURE_FIELD_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_DESCRIPTION): str,
+        vol.Optional(ATTR_REQUIRED): bool,
+        vol.Required(CONF_SELECTOR): selector.validate_selector,
+    }
+)
+
+
+def _structure_schema(value: dict[str, Any]) -> vol.Schema:
+    """Return the structure fields as a schema, the same way the AI Task service does."""
+    return vol.Schema(
+        {
+            (vol.Required if field.get(ATTR_REQUIRED, False) else vol.Optional)(
+                name, description=field.get(CONF_DESCRIPTION)
+            ): selector.selector(field[CONF_SELECTOR])
+            for name, field in value.items()
+        },
+        extra=vol.PREVENT_EXTRA,
+    )
+
+
+GENERATE_DATA_BATCH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_domain(ai_task.DOMAIN),
+        vol.Required(ATTR_TASK_NAME): cv.string,
+        vol.Required(ATTR_INSTRUCTIONS): cv.string,
+        vol.Required(ATTR_INPUTS): vol.All(cv.ensure_list, vol.Length(min=1, max=BATCH_MAX_ITEMS)),
+        vol.Optional(ATTR_STRUCTURE): vol.All(vol.Schema({str: STRUCTURE_FIELD_SCHEMA}), _structure_schema),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=BATCH_DEFAULT_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=BATCH_MAX_CONCURRENCY)
+        ),
+        vol.Optional(ATTR_BATCH_ID): cv.string,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GENERATE_DATA_BATCH,
+        _async_generate_data_batch,
+        schema=GENERATE_DATA_BATCH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _item_instructions(instructions: str, item: Any) -> str:
+    """Return the instructions of an item, the shared part followed by the input."""
+    return f"{instructions}\n\n{item if isinstance(item, str) else json_dumps(item)}"
+
+
+async def _async_generate_data_batch(call: ServiceCall) -> ServiceResponse:
+    """Generate data for many inputs with the same instructions and structure.
+
+    Items run concurrently up to the limit and each one is announced with
+    an event as soon as it is done. A failed item is reported with its error
+    and does not stop the others.
+    """
+    hass = call.hass
+    entity_id: str = call.data[ATTR_ENTITY_ID]
+    if (entity_entry := er.async_get(hass).async_get(entity_id)) is None or entity_entry.platform != DOMAIN:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="not_ai_task_entity",
+            translation_placeholders={"entity_id": entity_id},
+        )
+
+    # Known in advance, the item events of a batch can be told apart while it runs
+    batch_id: str = call.data.get(ATTR_BATCH_ID) or ulid_now()
+    inputs: list[Any] = call.data[ATTR_INPUTS]
+    results: list[dict[str, Any]] = [{} for _ in inputs]
+    pending: Iterator[tuple[int, Any]] = enumerate(inputs)
+    start = time.monotonic()
+
+    async def _async_worker() -> None:
+        # Workers share the iterator, so each item is taken once
+        for index, item in pending:
+            result: dict[str, Any] = {"index": index}
+            try:
+                task_result = await ai_task.async_generate_data(
+                    hass,
+                    task_name=call.data[ATTR_TASK_NAME],
+                    entity_id=entity_id,
+                    instructions=_item_instructions(call.data[ATTR_INSTRUCTIONS], item),
+                    structure=call.data.get(ATTR_STRUCTURE),
+                )
+            except HomeAssistantError as err:
+                LOGGER.debug("Item %d of batch %s failed: %s", index, batch_id, err)
+                result["error"] = str(err)
+            except Exception as err:
+                LOGGER.exception("Unexpected error in item %d of batch %s", index, batch_id)
+                result["error"] = str(err) or type(err).__name__
+            else:
+                result["data"] = task_result.data
+            results[index] = result
+            hass.bus.async_fire(EVENT_BATCH_ITEM, {"batch_id": batch_id, "entity_id": entity_id, **result})
+
+    await asyncio.gather(*(_async_worker() for _ in range(min(call.data[ATTR_MAX_CONCURRENCY], len(inputs)))))
+
+    failed = sum("error" in result for result in results)
+    LOGGER.debug(
+        "Batch %s of %d items finished in %.1fs, %d failed", batch_id, len(inputs), time.monotonic() - start, failed
+    )
+    return {
+        "batch_id": batch_id,
+        "succeeded": len(inputs) - failed,
+        "failed": failed,
+        "results": results,
+    }
@@ -0,0 +1,257 @@
+"""Runtime statistics for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import callback
+
+
+@dataclass
+class ToolCallStats:
+    """Tool call counters of a config entry.
+
+    Every model response that requests tools costs one round trip. Without
+    parallel tool calls each tool call would need its own round trip.
+    """
+
+    rounds: int = 0
+    tool_calls: int = 0
+    parallel_rounds: int = 0
+
+    @callback
+    def async_record_round(self, tool_calls: int) -> None:
+        """Record a model response that requested tool calls."""
+        self.rounds += 1
+        self.tool_calls += tool_calls
+        if tool_calls > 1:
+            self.parallel_rounds += 1
+
+    @property
+    def round_trips_saved(self) -> int:
+        """Return the number of round trips saved by parallel tool calls."""
+        return self.tool_calls - self.rounds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "rounds": self.rounds,
+            "tool_calls": self.tool_calls,
+            "parallel_rounds": self.parallel_rounds,
+            "round_trips_saved": self.round_trips_saved,
+        }
+
+
+@dataclass
+class ConnectionStats:
+    """HTTP connection counters of a config entry.
+
+    With keep-alive working, new connections and TLS handshakes stay far
+    below the number of requests. The time to response headers is tracked
+    separately for requests that had to open a connection (cold) and
+    requests that reused one (warm). Warm-up requests only count in
+    warm_ups, so the connections they open show up as reused.
+    """
+
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+    warm_ups: int = 0
+    cold_requests: int = 0
+    cold_latency: float = 0.0
+    warm_requests: int = 0
+    warm_latency: float = 0.0
+    last_request: float | None = None
+
+    @property
+    def idle_time(self) -> float:
+        """Return the seconds since the last request."""
+        if self.last_request is None:
+            return math.inf
+        return time.monotonic() - self.last_request
+
+    @callback
+    def async_record_activity(self) -> None:
+        """Record a request that keeps the connection busy, including warm-ups."""
+        self.last_request = time.monotonic()
+
+    @callback
+    def async_record_request(self) -> None:
+        """Record a request."""
+        self.requests += 1
+        self.async_record_activity()
+
+    @callback
+    def async_record_latency(self, latency: float, cold: bool) -> None:
+        """Record the time to response headers of a request."""
+        if cold:
+            self.cold_requests += 1
+            self.cold_latency += latency
+        else:
+            self.warm_requests += 1
+            self.warm_latency += latency
+
+    @callback
+    def async_record_warm_up(self) -> None:
+        """Record a connection warm-up."""
+        self.warm_ups += 1
+
+    @callback
+    def async_record_connection(self) -> None:
+        """Record a new connection."""
+        self.connections += 1
+
+    @callback
+    def async_record_tls_handshake(self) -> None:
+        """Record a TLS handshake."""
+        self.tls_handshakes += 1
+
+    @property
+    def reuse_rate(self) -> float:
+        """Return the share of requests sent over an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.requests)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_rate": round(self.reuse_rate, 3),
+            "warm_ups": self.warm_ups,
+            "cold_requests": self.cold_requests,
+            "cold_latency_ms": round(self.cold_latency / self.cold_requests * 1000) if self.cold_requests else None,
+            "warm_requests": self.warm_requests,
+            "warm_latency_ms": round(self.warm_latency / self.warm_requests * 1000) if self.warm_requests else None,
+        }
+
+
+@dataclass
+class RetryStats:
+    """Retry counters of a config entry."""
+
+    stream_retries: int = 0
+    request_retries: int = 0
+    recovered: int = 0
+    exhausted: int = 0
+    delay: float = 0.0
+
+    @callback
+    def async_record_retry(self, path: str, delay: float) -> None:
+        """Record a retry of the stream or request path."""
+        if path == "stream":
+            self.stream_retries += 1
+        else:
+            self.request_retries += 1
+        self.delay += delay
+
+    @callback
+    def async_record_recovered(self) -> None:
+        """Record a request that succeeded after retries."""
+        self.recovered += 1
+
+    @callback
+    def async_record_exhausted(self) -> None:
+        """Record a request that failed after retries."""
+        self.exhausted += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "stream_retries": self.stream_retries,
+            "request_retries": self.request_retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+            "delay": round(self.delay, 1),
+        }
+
+
+@dataclass
+class SentenceStats:
+    """Sentence streaming counters of a config entry.
+
+    The time to the first sentence is what a voice pipeline waits before
+    text-to-speech can start speaking.
+    """
+
+    turns: int = 0
+    sentences: int = 0
+    first_sentence_time: float = 0.0
+
+    @callback
+    def async_record_turn(self, sentences: int, first_sentence_time: float | None) -> None:
+        """Record the sentences streamed in a turn."""
+        self.sentences += sentences
+        if first_sentence_time is not None:
+            self.turns += 1
+            self.first_sentence_time += first_sentence_time
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {
+            "turns": self.turns,
+            "sentences": self.sentences,
+            "average_first_sentence_ms": (
+                round(self.first_sentence_time / self.turns * 1000) if self.turns else None
+            ),
+        }
+
+
+@dataclass
+class CascadeStats:
+    """Two-tier cascade counters of an agent.
+
+    Turns start on the small model and some are escalated to the large one.
+    The time of an escalated turn is split at the escalation.
+    """
+
+    turns: int = 0
+    escalations: dict[str, int] = field(default_factory=dict)
+    small_time: float = 0.0
+    large_time: float = 0.0
+
+    @callback
+    def async_record_turn(self, escalation: str | None, small_time: float, large_time: float) -> None:
+        """Record a turn and the time spent on each tier."""
+        self.turns += 1
+        self.small_time += small_time
+        if escalation is not None:
+            self.escalations[escalation] = self.escalations.get(escalation, 0) + 1
+            self.large_time += large_time
+
+    @property
+    def escalation_rate(self) -> float:
+        """Return the share of turns escalated to the large model."""
+        if not self.turns:
+            return 0.0
+        return sum(self.escalations.values()) / self.turns
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        escalated = sum(self.escalations.values())
+        return {
+            "turns": self.turns,
+            "escalation_rate": round(self.escalation_rate, 3),
+            "escalations": dict(self.escalations),
+            "average_small_tier_ms": round(self.small_time / self.turns * 1000) if self.turns else None,
+            "average_large_tier_ms": round(self.large_time / escalated * 1000) if escalated else None,
+        }
@@ -0,0 +1,223 @@
+"""Per-turn latency instrumentation for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from openai.types.chat import ChatCompletionChunk
+
+from .const import DOMAIN, LATENCY_WINDOW, LOGGER
+
+EVENT_TURN_TIMING = f"{DOMAIN}_turn_timing"
+SIGNAL_LATENCY_UPDATED = f"{DOMAIN}_latency_updated_{{}}"
+
+METRIC_TOTAL = "total"
+METRIC_FIRST_TOKEN = "first_token"
+METRIC_FIRST_SENTENCE = "first_sentence"
+PERCENTILES = (50, 90, 99)
+
+
+class TurnTiming:
+    """Phase timings of a conversation turn or an AI task.
+
+    Each mark records the time since the previous mark under a phase name.
+    Marks made after an iteration has started belong to that iteration.
+    """
+
+    def __init__(self) -> None:
+        """Start timing the turn."""
+        self._start = self._last = time.monotonic()
+        self.phases: dict[str, float] = {}
+        self.iterations: list[dict[str, float]] = []
+        self.first_token: float | None = None
+        self.first_sentence: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        """Return the time since the start of the turn."""
+        return time.monotonic() - self._start
+
+    @callback
+    def async_mark(self, phase: str) -> None:
+        """Record the time since the previous mark."""
+        now = time.monotonic()
+        phases = self.iterations[-1] if self.iterations else self.phases
+        phases[phase] = phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @callback
+    def async_start_iteration(self) -> None:
+        """Start a new round trip to the model."""
+        self.iterations.append({})
+
+    @callback
+    def async_first_token(self) -> None:
+        """Record the first token of the turn."""
+        if self.first_token is None:
+            self.first_token = self.elapsed
+
+    @callback
+    def async_first_sentence(self) -> None:
+        """Record the first sentence of the turn."""
+        if self.first_sentence is None:
+            self.first_sentence = self.elapsed
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timings in milliseconds."""
+        return {
+            METRIC_TOTAL: _ms(self.elapsed),
+            METRIC_FIRST_TOKEN: _ms(self.first_token) if self.first_token is not None else None,
+            METRIC_FIRST_SENTENCE: _ms(self.first_sentence) if self.first_sentence is not None else None,
+            "phases": {phase: _ms(duration) for phase, duration in self.phases.items()},
+            "iterations": [
+                {phase: _ms(duration) for phase, duration in iteration.items()} for iteration in self.iterations
+            ],
+        }
+
+
+def timed_request[T](
+    request: Callable[[], Awaitable[T]], timing: TurnTiming, phase: str
+) -> Callable[[], Awaitable[T]]:
+    """Wrap a request to mark the time until it returns."""
+
+    async def _async_request() -> T:
+        result = await request()
+        timing.async_mark(phase)
+        return result
+
+    return _async_request
+
+
+async def async_timed_stream(
+    stream: AsyncIterable[ChatCompletionChunk], timing: TurnTiming
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Mark the first token and the end of generation of a streamed response.
+
+    Consumers stop reading at the finish reason, so generation ends there.
+    """
+    first = True
+    async for chunk in stream:
+        if first:
+            first = False
+            timing.async_first_token()
+            timing.async_mark("first_chunk")
+        if not chunk.choices or chunk.choices[0].finish_reason:
+            timing.async_mark("generation")
+        yield chunk
+
+
+def _ms(seconds: float) -> int:
+    """Convert seconds to whole milliseconds."""
+    return round(seconds * 1000)
+
+
+def _percentile(values: list[float], percentile: int) -> float:
+    """Return a nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(percentile / 100 * len(values)) - 1)]
+
+
+class LatencyTracker:
+    """Rolling latency percentiles per subentry and per model.
+
+    Every finished turn is announced with an event carrying its phase
+    breakdown, and the sensors of the subentry are updated.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: int = LATENCY_WINDOW) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._window = window
+        self._subentries: dict[str, dict[str, deque[float]]] = {}
+        self._models: dict[str, dict[str, deque[float]]] = {}
+
+    @callback
+    def async_record(
+        self,
+        subentry_id: str,
+        entity_id: str | None,
+        model: str,
+        conversation_id: str,
+        timing: TurnTiming,
+    ) -> None:
+        """Record a finished turn."""
+        data = timing.as_dict()
+        samples = {name: data[name] for name in (METRIC_TOTAL, METRIC_FIRST_TOKEN, METRIC_FIRST_SENTENCE)}
+        for name, duration in data["phases"].items():
+            samples[name] = duration
+        for iteration in data["iterations"]:
+            for name, duration in iteration.items():
+                samples[name] = samples.get(name, 0) + duration
+
+        for windows in (
+            self._subentries.setdefault(subentry_id, {}),
+            self._models.setdefault(model, {}),
+        ):
+            for name, duration in samples.items():
+                if duration is not None:
+                    windows.setdefault(name, deque(maxlen=self._window)).append(duration)
+
+        LOGGER.debug("Turn of %s took %d ms: %s", entity_id, data[METRIC_TOTAL], data)
+        self._hass.bus.async_fire(
+            EVENT_TURN_TIMING,
+            {
+                "subentry_id": subentry_id,
+                "entity_id": entity_id,
+                "model": model,
+                "conversation_id": conversation_id,
+                **data,
+            },
+        )
+        async_dispatcher_send(self._hass, SIGNAL_LATENCY_UPDATED.format(subentry_id))
+
+    @callback
+    def async_remove(self, subentry_id: str) -> None:
+        """Forget the samples of a removed subentry."""
+        self._subentries.pop(subentry_id, None)
+
+    def percentiles(self, subentry_id: str, metric: str) -> dict[str, float] | None:
+        """Return the percentiles of a metric of a subentry in milliseconds."""
+        return _percentiles(self._subentries.get(subentry_id, {}).get(metric))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the percentiles of all metrics."""
+        return {
+            "subentries": {
+                subentry_id: {name: _percentiles(values) for name, values in windows.items()}
+                for subentry_id, windows in self._subentries.items()
+            },
+            "models": {
+                model: {name: _percentiles(values) for name, values in windows.items()}
+                for model, windows in self._models.items()
+            },
+        }
+
+
+def _percentiles(values: deque[float] | None) -> dict[str, float] | None:
+    """Return the percentiles and the number of samples of a window."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        **{f"p{percentile}": _percentile(ordered, percentile) for percentile in PERCENTILES},
+        "samples": len(ordered),
+    }
@@ -0,0 +1,196 @@
+"""Token usage accounting for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk
+
+from .const import DOMAIN, LOGGER, USAGE_SAVE_DELAY
+
+USAGE_STORAGE_VERSION = 1
+
+SIGNAL_USAGE_UPDATED = f"{DOMAIN}_usage_updated_{{}}"
+
+
+@dataclass(slots=True)
+class UsageCounters:
+    """Token usage of a day."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    # Tokens of paid models without a configured price, left out of the cost
+    unpriced_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Return the prompt and completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, usage: CompletionUsage, cost: float | None) -> None:
+        """Add the usage of a request, a cost of None means the price is unknown."""
+        self.requests += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        if cost is None:
+            self.unpriced_tokens += usage.prompt_tokens + usage.completion_tokens
+        else:
+            self.cost += cost
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {**asdict(self), "cost": round(self.cost, 4), "total_tokens": self.total_tokens}
+
+
+def _usage_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the storage of the usage of a config entry."""
+    return Store(hass, USAGE_STORAGE_VERSION, f"{DOMAIN}.usage.{entry_id}", private=True)
+
+
+async def async_remove_usage(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the persisted usage of a config entry."""
+    await _usage_store(hass, entry_id).async_remove()
+
+
+class UsageTracker:
+    """Daily token usage of the agents of a config entry.
+
+    Usage is counted per subentry and per model and starts over at local
+    midnight. It is persisted, so budgets hold across restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._store = _usage_store(hass, entry_id)
+        self._day = dt_util.now().date().isoformat()
+        self._subentries: dict[str, UsageCounters] = {}
+        self._models: dict[str, UsageCounters] = {}
+
+    async def async_load(self) -> None:
+        """Load the usage of today."""
+        if (data := await self._store.async_load()) is None or data["day"] != self._day:
+            return
+        self._subentries = {key: UsageCounters(**value) for key, value in data["subentries"].items()}
+        self._models = {key: UsageCounters(**value) for key, value in data["models"].items()}
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        """Start over at midnight until the entry is unloaded."""
+        entry.async_on_unload(async_track_time_change(self._hass, self._async_midnight, hour=0, minute=0, second=0))
+
+    async def async_save(self) -> None:
+        """Save the usage right away."""
+        await self._store.async_save(self._data_to_save())
+
+    @property
+    def last_reset(self) -> datetime:
+        """Return the start of the counted day."""
+        return dt_util.start_of_local_day(dt_util.parse_date(self._day))
+
+    @callback
+    def async_record(self, subentry_id: str, model: str, usage: CompletionUsage, cost: float | None) -> None:
+        """Record the usage of a request."""
+        self._async_roll_over()
+        for counters in (
+            self._subentries.setdefault(subentry_id, UsageCounters()),
+            self._models.setdefault(model, UsageCounters()),
+        ):
+            counters.add(usage, cost)
+        LOGGER.debug(
+            "Used %d prompt and %d completion tokens of %s", usage.prompt_tokens, usage.completion_tokens, model
+        )
+        self._store.async_delay_save(self._data_to_save, USAGE_SAVE_DELAY)
+        async_dispatcher_send(self._hass, SIGNAL_USAGE_UPDATED.format(subentry_id))
+
+    @callback
+    def async_remove(self, subentry_id: str) -> None:
+        """Forget the usage of a removed subentry."""
+        self._subentries.pop(subentry_id, None)
+
+    def usage(self, subentry_id: str) -> UsageCounters:
+        """Return the usage of a subentry today."""
+        if self._day != dt_util.now().date().isoformat():
+            return UsageCounters()
+        return self._subentries.get(subentry_id) or UsageCounters()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the usage of today."""
+        return {
+            "day": self._day,
+            "subentries": {key: counters.as_dict() for key, counters in self._subentries.items()},
+            "models": {key: counters.as_dict() for key, counters in self._models.items()},
+        }
+
+    @callback
+    def _async_midnight(self, _now: datetime) -> None:
+        """Start counting a new day."""
+        subentry_ids = list(self._subentries)
+        self._async_roll_over()
+        for subentry_id in subentry_ids:
+            async_dispatcher_send(self._hass, SIGNAL_USAGE_UPDATED.format(subentry_id))
+
+    @callback
+    def _async_roll_over(self) -> None:
+        """Drop the usage of a previous day."""
+        if (day := dt_util.now().date().isoformat()) == self._day:
+            return
+        self._day = day
+        self._subentries.clear()
+        self._models.clear()
+        self._store.async_delay_save(self._data_to_save, USAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the usage to persist."""
+        return {
+            "day": self._day,
+            "subentries": {key: asdict(counters) for key, counters in self._subentries.items()},
+            "models": {key: asdict(counters) for key, counters in self._models.items()},
+        }
+
+
+async def async_usage_stream(
+    stream: AsyncIterable[ChatCompletionChunk], on_usage: Callable[[CompletionUsage], None]
+) -> AsyncGenerator[ChatCompletionChunk, None]:
+    """Pass on a streamed response and report its usage.
+
+    The usage arrives in a chunk of its own after the finish reason, but
+    consumers stop reading at the finish reason. The rest of the stream is
+    read before the last chunk is passed on.
+    """
+    iterator = aiter(stream)
+    async for chunk in iterator:
+        if not chunk.choices or chunk.choices[0].finish_reason:
+            usage = chunk.usage
+            async for trailing in iterator:
+                usage = trailing.usage or usage
+            if usage is not None:
+                on_usage(usage)
+        yield chunk
@@ -0,0 +1,124 @@
+"""Connection warm-up for Cloud.ru Foundation Models."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+import httpx
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .client import WARMUP_EXTENSION
+from .const import (CLIENT_BASE_URI, DOMAIN, LOGGER, WARMUP_MIN_IDLE,
+                    WARMUP_TIMEOUT)
+from .stats import ConnectionStats
+
+ASSIST_SATELLITE_DOMAIN = "assist_satellite"
+ASSIST_SATELLITE_LISTENING = "listening"
+
+
+@callback
+def _async_is_satellite_listening(event_data: dict[str, Any]) -> bool:
+    """Return if an assist satellite started listening after a wake word."""
+    new_state = event_data["new_state"]
+    return bool(
+        event_data["entity_id"].startswith(f"{ASSIST_SATELLITE_DOMAIN}.")
+        and new_state is not None
+        and new_state.state == ASSIST_SATELLITE_LISTENING
+    )
+
+
+class ConnectionWarmer:
+    """Keep a connection to Cloud.ru open between requests.
+
+    A cheap unauthenticated request is sent once the connection has been idle
+    for the interval, and when a voice satellite starts listening. Any
+    response, even an error, leaves a warm connection in the pool.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        http_client: httpx.AsyncClient,
+        stats: ConnectionStats,
+        interval: float,
+    ) -> None:
+        """Initialize the warmer."""
+        self._hass = hass
+        self._entry = entry
+        self._http_client = http_client
+        self._stats = stats
+        self._interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start warming the connection until the entry is unloaded."""
+        self._entry.async_on_unload(
+            async_track_time_interval(
+                self._hass,
+                self._async_interval_elapsed,
+                timedelta(seconds=self._interval),
+                name=f"{DOMAIN} connection warm-up",
+                cancel_on_shutdown=True,
+            )
+        )
+        self._entry.async_on_unload(
+            self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_satellite_listening, event_filter=_async_is_satellite_listening
+            )
+        )
+        self.async_schedule_warm_up()
+
+    @callback
+    def _async_interval_elapsed(self, _now: datetime) -> None:
+        """Warm up the connection if it has been idle for the interval."""
+        if self._stats.idle_time >= self._interval:
+            self.async_schedule_warm_up()
+
+    @callback
+    def _async_satellite_listening(self, _event: Event[Any]) -> None:
+        """Warm up the connection before the voice command arrives."""
+        if self._stats.idle_time >= WARMUP_MIN_IDLE:
+            self.async_schedule_warm_up()
+
+    @callback
+    def async_schedule_warm_up(self) -> None:
+        """Warm up the connection in the background."""
+        if self._task is None or self._task.done():
+            self._task = self._entry.async_create_background_task(
+                self._hass, self._async_warm_up(), f"{DOMAIN} connection warm-up"
+            )
+
+    async def _async_warm_up(self) -> None:
+        """Send the warm-up request."""
+        start = time.monotonic()
+        try:
+            await self._http_client.head(
+                f"{CLIENT_BASE_URI}/models", timeout=WARMUP_TIMEOUT, extensions={WARMUP_EXTENSION: True}
+            )
+        except httpx.HTTPError as err:
+            LOGGER.debug("Connection warm-up failed: %s", err)
+            return
+        self._stats.async_record_warm_up()
+        LOGGER.debug("Warmed up the connection in %.3fs", time.monotonic() - start)
@@ -0,0 +1,65 @@
+"""Tests of the small-to-large model cascade."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from homeassistant.helpers import llm
+
+from custom_components.cloud_ru_ai.cascade import (ESCALATE_TOOL_NAME,
+                                                   CascadeTurn, Escalation,
+                                                   async_watch_escalation)
+from custom_components.cloud_ru_ai.routing import Route
+
+
+async def _aiter(items: list[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    """Yield the deltas."""
+    for item in items:
+        yield item
+
+
+def _watch(deltas: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], CascadeTurn]:
+    """Return the deltas passed on by the small tier and the turn."""
+    cascade = CascadeTurn("small", Route(["large"], "large"))
+
+    async def _collect() -> list[dict[str, Any]]:
+        return [delta async for delta in async_watch_escalation(_aiter(deltas), cascade)]
+
+    return asyncio.run(_collect()), cascade
+
+
+def test_text_is_passed_on_without_escalation() -> None:
+    """Test the text of the small model is passed on once its response ends."""
+    passed, cascade = _watch([{"role": "assistant", "content": "Свет "}, {"content": "включен."}])
+
+    assert passed == [{"role": "assistant"}, {"content": "Свет включен."}]
+    assert cascade.escalation is None
+
+
+def test_text_is_dropped_on_escalation() -> None:
+    """Test the text streamed before the escalation is neither shown nor spoken."""
+    escalate = llm.ToolInput(id="call_0", tool_name=ESCALATE_TOOL_NAME, tool_args={})
+    passed, cascade = _watch(
+        [
+            {"role": "assistant", "content": "Наверное, "},
+            {"content": "нужно подумать."},
+            {"tool_calls": [escalate]},
+        ]
+    )
+
+    assert passed == [{"role": "assistant"}]
+    assert cascade.escalation is Escalation.UNCERTAIN
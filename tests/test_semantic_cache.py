@@ -0,0 +1,70 @@
+"""Tests of the semantic cache of conversation tool plans."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from custom_components.cloud_ru_ai.semantic_cache import (SemanticCache,
+                                                          normalize_utterance)
+
+SCOPE = ("ru", None, None)
+
+
+def test_normalize_keeps_word_order() -> None:
+    """Test the words of an utterance keep their order."""
+    words = normalize_utterance("Пожалуйста, включи свет и выключи вентилятор!")
+
+    assert words == ("включи", "свет", "и", "выключи", "вентилятор")
+
+
+@pytest.mark.parametrize(
+    ("stored", "tool_calls", "query"),
+    [
+        (
+            "Включи свет и выключи вентилятор",
+            [("HassTurnOn", {"name": "свет"}), ("HassTurnOff", {"name": "вентилятор"})],
+            "Выключи свет и включи вентилятор",
+        ),
+        (
+            "Set kitchen to 20 and bedroom to 22",
+            [
+                ("HassClimateSetTemperature", {"area": "kitchen", "temperature": 20}),
+                ("HassClimateSetTemperature", {"area": "bedroom", "temperature": 22}),
+            ],
+            "Set kitchen to 22 and bedroom to 20",
+        ),
+    ],
+    ids=["swapped_actions", "swapped_numbers"],
+)
+def test_swapped_words_do_not_replay_actions(stored: str, tool_calls: list, query: str) -> None:
+    """Test an action plan is not replayed for the same words in another order."""
+    cache = SemanticCache(0.8)
+    cache.async_store(stored, SCOPE, tool_calls, "[]", "Готово")
+
+    assert cache.async_lookup(query, SCOPE) is None
+    assert cache.async_lookup(stored, SCOPE) is not None
+
+
+def test_read_only_plan_matches_reordered_query() -> None:
+    """Test a read-only plan is still found for a query with reordered words."""
+    cache = SemanticCache(0.8)
+    cache.async_store(
+        "Какая температура на кухне", SCOPE, [("GetLiveContext", {})], "[]", "21 градус"
+    )
+
+    plan = cache.async_lookup("На кухне какая температура", SCOPE)
+
+    assert plan is not None
+    assert plan.response == "21 градус"
@@ -0,0 +1,50 @@
+"""Tests of the sentence chunking for streamed text-to-speech."""
+
+# Copyright 2026 @black-roland and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from custom_components.cloud_ru_ai.sentences import SentenceChunker
+
+
+def _chunk(text: str) -> list[str]:
+    """Return the chunks of a text streamed a few characters at a time."""
+    chunker = SentenceChunker(20, 200)
+    chunks = [chunk for i in range(0, len(text), 7) for chunk in chunker.feed(text[i:i + 7])]
+    if rest := chunker.flush():
+        chunks.append(rest)
+    assert "".join(chunks) == text
+    return chunks
+
+
+def test_number_ends_sentence() -> None:
+    """Test a period after a decimal number ends the sentence."""
+    text = "Температура в гостиной 21.5. Влажность 40%. Окна закрыты."
+
+    assert _chunk(text) == [
+        "Температура в гостиной 21.5. ",
+        "Влажность 40%. Окна закрыты.",
+    ]
+
+
+def test_abbreviations_do_not_end_sentence() -> None:
+    """Test a period after an abbreviation does not end the sentence."""
+    text = (
+        "Закройте окна, т.е. все окна в доме. "
+        "Дверь на ул. Ленина открыта."
+    )
+
+    assert _chunk(text) == [
+        "Закройте окна, т.е. все окна в доме. ",
+        "Дверь на ул. Ленина открыта.",
+    ]